@@ -1,10 +1,22 @@
+import argparse
+import atexit
+import copy
+import csv
+import gzip
+import itertools
+import json
+import multiprocessing
+import pickle
+import queue
+import threading
 import pygame
 import neat
 import time
 import os
 import random
+from collections import OrderedDict, deque, namedtuple
 
-pygame.font.init()
+import numpy as np
 
 WIDTH = 500
 HEIGHT = 800
@@ -12,26 +24,96 @@ PANEL_WIDTH = 360
 WINDOW_WIDTH = WIDTH + PANEL_WIDTH
 current_directory= os.path.dirname(os.path.abspath(__file__))
 
-birdIMGs = [pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs","bird1.png"))),
-            pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs","bird2.png"))),pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs","bird3.png")))]
 
-pipeIMG = pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs","pipe.png")))
+class AssetRegistry:
+    """Images, fonts and derived surfaces, each built by its loader on first use and kept.
 
-BGIMG = pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs","bg.png")))
+    Nothing is read from disk or looked up in the font database at import time,
+    so worker processes and headless runs only pay for what they touch: the
+    simulation needs the bird and pipe sprites and their collision masks, never
+    the background, the base, the fonts or the rotated sprite atlas.
+    """
 
-baseIMG = pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs","base.png")))
+    def __init__(self):
+        self.loaders = {}
+        self.items = {}
 
-statFont = pygame.font.SysFont("comicsans",32)
-panelTitleFont = pygame.font.SysFont("bahnschrift",36)
-panelFont = pygame.font.SysFont("bahnschrift",20)
-diagramLabelFont = pygame.font.SysFont("bahnschrift",14)
-diagramMessageFont = pygame.font.SysFont("bahnschrift",18)
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def __getitem__(self, name):
+        if name not in self.items:
+            self.items[name] = self.loaders[name]()
+        return self.items[name]
+
+    def loaded(self):
+        """Return the names of the assets built so far."""
+        return sorted(self.items)
+
+
+def _load_image(name):
+    return pygame.transform.scale2x(pygame.image.load(os.path.join(current_directory+"/imgs",name)))
+
+
+def _load_font(name, size):
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont(name,size)
+
+
+ASSETS = AssetRegistry()
+ASSETS.register("birdIMGs", lambda: [_load_image("bird1.png"), _load_image("bird2.png"), _load_image("bird3.png")])
+ASSETS.register("pipeIMG", lambda: _load_image("pipe.png"))
+ASSETS.register("pipeTopIMG", lambda: pygame.transform.flip(ASSETS["pipeIMG"],False,True))
+ASSETS.register("BGIMG", lambda: _load_image("bg.png"))
+ASSETS.register("baseIMG", lambda: _load_image("base.png"))
+# collision masks never change, so build them once instead of per test
+ASSETS.register("birdMasks", lambda: [pygame.mask.from_surface(img) for img in ASSETS["birdIMGs"]])
+ASSETS.register("pipeTopMask", lambda: pygame.mask.from_surface(ASSETS["pipeTopIMG"]))
+ASSETS.register("pipeBotMask", lambda: pygame.mask.from_surface(ASSETS["pipeIMG"]))
+ASSETS.register("birdAtlas", lambda: SpriteAtlas(ASSETS["birdIMGs"], Bird.reachableTilts()))
+ASSETS.register("statFont", lambda: _load_font("comicsans",32))
+ASSETS.register("panelTitleFont", lambda: _load_font("bahnschrift",36))
+ASSETS.register("panelFont", lambda: _load_font("bahnschrift",20))
+ASSETS.register("diagramLabelFont", lambda: _load_font("bahnschrift",14))
+ASSETS.register("diagramMessageFont", lambda: _load_font("bahnschrift",18))
 
 GENERATION = 0
 BEST_SCORE = 0
-EVENT_LOG = []
+EVENT_LOG_SIZE = 64
 ACTIVE_CONFIG = None
 WINDOW_SURFACE = None
+HEADLESS = False
+
+# physics steps per rendered frame; None runs as many as fit in a display frame
+SIM_SPEEDS = (1, 4, 16, None)
+SIM_SPEED = 0
+DISPLAY_FPS = 30
+# set when the simulation runs on its own thread and hands frames to the window
+FRAME_EXCHANGE = None
+
+# phases of a simulation step timed by the FrameProfiler, in loop order
+PROFILE_PHASES = ("events", "physics", "activation", "collision", "pipes", "panel", "draw")
+PROFILER = None
+
+# directory that receives a trajectory file per generation (see TrajectoryRecorder)
+RECORD_DIR = None
+TRAJECTORY_MAGIC = b"FLAPTRAJ"
+TRAJECTORY_VERSION = 1
+TRAJECTORY_PIPE_SLOTS = 4
+TRAJECTORY_ALIGN = 4096
+# steps the viewer advances per frame at the "max" speed
+VIEWER_MAX_STEPS = 64
+
+# per-generation limits: physics steps, score and wall-clock seconds (None is unlimited)
+GENERATION_CAPS = {"frames": None, "score": None, "seconds": None}
+# the same limits for the window's replays of a generation's best genome
+REPLAY_CAPS = {"frames": 1800, "score": None, "seconds": None}
+
+# courses each genome flies per generation, and how their fitness values are
+# combined: "mean", "min" or a quantile between 0 and 1
+COURSE_COUNT = 1
+COURSE_AGGREGATE = "mean"
 
 INPUT_LABELS = {
     -1: "Bird Y",
@@ -43,13 +125,604 @@ OUTPUT_LABELS = {
     0: "Flap",
 }
 
+# node layerings keyed by genome topology, most recently used last
+LAYER_CACHE_SIZE = 256
+LAYER_CACHE = OrderedDict()
+
+# rendered network diagrams, most recently used last
+DIAGRAM_CACHE_SIZE = 8
+DIAGRAM_CACHE = OrderedDict()
+
+# rendered text keyed by (font, string, colour), most recently used last
+TEXT_CACHE_SIZE = 256
+TEXT_CACHE = OrderedDict()
+PANEL_BACKGROUND = None
+
+
+def render_text(font, text, colour):
+    """Return ``font.render(text, True, colour)``, reusing the surface while it repeats."""
+    key = (font, text, colour)
+    surface = TEXT_CACHE.get(key)
+    if surface is not None:
+        TEXT_CACHE.move_to_end(key)
+        return surface
+
+    surface = font.render(text, True, colour)
+    TEXT_CACHE[key] = surface
+    if len(TEXT_CACHE) > TEXT_CACHE_SIZE:
+        TEXT_CACHE.popitem(last=False)
+    return surface
+
 
-def log_event(message):
-    """Append a formatted event message to the shared event history."""
-    EVENT_LOG.append(message)
-    # keep only the most recent 10 entries for readability
-    if len(EVENT_LOG) > 10:
-        del EVENT_LOG[0]
+# display text for each kind of event; records are only formatted when shown
+EVENT_FORMATS = {
+    "generation_started": "Generation {generation} started with {birds} birds",
+    "generation_distributed": "Generation {generation} started with {birds} birds on {workers} workers",
+    "generation_completed": "Generation {generation} completed | last score {score} | peak fitness {fitness:.1f} | duration {duration:.1f}s",
+    "generation_capped": "Generation {generation} stopped at {reason} with {alive} birds alive",
+    "slices_capped": "Generation {generation} slices stopped at {reason}",
+    "crash": "Bird {bird} crashed | score {score} | fitness {fitness:.1f}",
+    "out_of_bounds": "Bird {bird} out of bounds at y={y:.0f}",
+    "best_score": "New best score {score} reached in generation {generation}",
+    "score": "Score increased to {score}; pipe speed {pipe_speed:.1f}",
+    "replay_best": "Replaying best genome {genome} (fitness {fitness:.1f})",
+    "replay": "Replay {generation} of genome {genome}",
+    "checkpoint": "Checkpoint after generation {generation} queued",
+    "recording": "Step {step} of {steps}{state}",
+}
+
+Event = namedtuple("Event", "kind generation bird score fitness timestamp data")
+
+
+def format_event(event):
+    return EVENT_FORMATS[event.kind].format(**event._asdict(), **event.data)
+
+
+def _to_json(record):
+    # numpy scalars (bird ids, fitness) come out as plain numbers
+    return json.dumps(record, default=lambda value: value.item())
+
+
+class EventSink:
+    """Stream every event to a JSONL file from a background thread.
+
+    ``put`` only enqueues the record, so the frame loop never waits on
+    encoding or the disk. The file is flushed and closed when the process
+    exits, including through the window's close button.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._write, name="event-sink", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, event):
+        self.queue.put(event)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _write(self):
+        with open(self.path, "a", encoding="utf-8") as handle:
+            while True:
+                batch = [self.queue.get()]
+                while not self.queue.empty():
+                    batch.append(self.queue.get())
+                done = batch[-1] is None
+                lines = []
+                for event in batch:
+                    if event is None:
+                        continue
+                    record = event._asdict()
+                    record.update(record.pop("data"))
+                    lines.append(_to_json(record) + "\n")
+                handle.writelines(lines)
+                handle.flush()
+                if done:
+                    return
+
+
+# the most recent events, for the panel; EVENT_SINK keeps the full history
+EVENT_LOG = deque(maxlen=EVENT_LOG_SIZE)
+EVENT_SINK = None
+
+
+def log_event(kind, bird=None, score=None, fitness=None, **data):
+    """Record an event of one of the ``EVENT_FORMATS`` kinds in the current generation."""
+    event = Event(kind, GENERATION, bird, score, fitness, time.time(), data)
+    EVENT_LOG.append(event)
+    if EVENT_SINK is not None:
+        EVENT_SINK.put(event)
+
+
+class TelemetryServer(neat.reporting.BaseReporter):
+    """Serve live training metrics over local HTTP without slowing the frame loop.
+
+    An asyncio loop on a daemon thread answers ``GET /snapshot`` with the
+    latest frame metrics, ``GET /generations`` with recent per-generation
+    summaries and ``GET /stream`` with both as Server-Sent Events. The
+    simulation only hands records over with ``call_soon_threadsafe``, and
+    frame snapshots are throttled to one per ``interval`` seconds. Writes
+    never wait for a client: while a client's unsent data exceeds
+    ``backlog_limit`` it skips snapshots until it catches up, and a
+    generation summary that finds it still behind disconnects it.
+    """
+
+    backlog_limit = 64 * 1024
+
+    def __init__(self, host="127.0.0.1", port=8765, interval=0.25, history=100):
+        self.interval = interval
+        self.next_frame = 0.0
+        self.snapshot = None
+        self.generations = deque(maxlen=history)
+        self.clients = set()
+        self.connections = set()
+        # imported here rather than at the top: asyncio pulls in ssl, which
+        # only telemetry runs should pay for at start-up
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self._server = None
+        self._error = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(host, port), name="telemetry", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        self.address = self._server.sockets[0].getsockname()[:2]
+        atexit.register(self.close)
+
+    def due(self):
+        """Return whether the frame loop should publish a snapshot now."""
+        return time.perf_counter() >= self.next_frame
+
+    def publish_frame(self, metrics):
+        self.next_frame = time.perf_counter() + self.interval
+        self._hand_over(self._store, "snapshot", metrics)
+
+    def post_evaluate(self, config, population, species, best_genome):
+        fitnesses = [g.fitness for g in population.values()]
+        completed = next((e for e in reversed(EVENT_LOG) if e.kind == "generation_completed"), None)
+        self._hand_over(self._store, "generation", {
+            "generation": GENERATION,
+            "timestamp": time.time(),
+            "population": len(population),
+            "species": len(species.species),
+            "best_fitness": best_genome.fitness,
+            "mean_fitness": sum(fitnesses) / len(fitnesses),
+            "best_genome": {"key": best_genome.key, "nodes": len(best_genome.nodes),
+                            "connections": len(best_genome.connections)},
+            "score": completed.score if completed else None,
+            "best_score": BEST_SCORE,
+            "duration": completed.data["duration"] if completed else None,
+        })
+
+    def close(self):
+        import asyncio
+        if self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+    def _hand_over(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # the server has shut down; the run goes on without it
+            pass
+
+    def _serve(self, host, port):
+        import asyncio
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(asyncio.start_server(self._handle, host, port))
+        except OSError as error:
+            self._error = error
+        self._ready.set()
+        if self._error is None:
+            self.loop.run_forever()
+        self.loop.close()
+
+    async def _shutdown(self):
+        import asyncio
+        self._server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        # aborting a connection ends its handler's read, so every handler returns
+        for writer in self.connections:
+            writer.transport.abort()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def _store(self, kind, record):
+        if kind == "snapshot":
+            self.snapshot = record
+        else:
+            self.generations.append(record)
+        if not self.clients:
+            return
+        message = f"event: {kind}\ndata: {_to_json(record)}\n\n".encode()
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > self.backlog_limit:
+                if kind == "generation":
+                    # closing would wait to flush the backlog, which this client is not reading
+                    self.clients.discard(writer)
+                    writer.transport.abort()
+                continue
+            writer.write(message)
+
+    async def _handle(self, reader, writer):
+        import asyncio
+        self.connections.add(writer)
+        try:
+            await self._respond(reader, writer)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.connections.discard(writer)
+            # buffered data is still flushed before the connection closes
+            writer.close()
+
+    async def _respond(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        method, _, rest = request.decode("latin-1").partition(" ")
+        path = rest.partition(" ")[0].partition("?")[0]
+
+        if method == "GET" and path == "/stream":
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            if self.snapshot is not None:
+                writer.write(f"event: snapshot\ndata: {_to_json(self.snapshot)}\n\n".encode())
+            self.clients.add(writer)
+            # clients send nothing more; this returns once they hang up
+            await reader.read()
+            return
+
+        if method == "GET" and path == "/snapshot":
+            status, body = "200 OK", _to_json(self.snapshot)
+        elif method == "GET" and path == "/generations":
+            status, body = "200 OK", _to_json(list(self.generations))
+        else:
+            status, body = "404 Not Found", _to_json({"error": f"no route for {method} {path}"})
+        payload = body.encode()
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+
+
+TELEMETRY = None
+
+
+def sim_speed_label():
+    steps = SIM_SPEEDS[SIM_SPEED]
+    return "max" if steps is None else f"{steps}x"
+
+
+def pump_events():
+    """Handle window events: closing quits, 1-4 and +/- pick the simulation speed.
+
+    Returns the other keys pressed, for callers with controls of their own.
+    """
+    global SIM_SPEED
+    keys = []
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit ()
+            quit ()
+        elif event.type == pygame.WINDOWEXPOSED:
+            SCREEN_REGIONS.invalidate()
+        elif event.type == pygame.KEYDOWN:
+            if pygame.K_1 <= event.key < pygame.K_1 + len(SIM_SPEEDS):
+                SIM_SPEED = event.key - pygame.K_1
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                SIM_SPEED = min(SIM_SPEED + 1, len(SIM_SPEEDS) - 1)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                SIM_SPEED = max(SIM_SPEED - 1, 0)
+            else:
+                keys.append(event.key)
+    return keys
+
+
+def refresh_window():
+    """Keep an open window answering during a wait with nothing new to draw.
+
+    Handles its events and shows the last frame again if the window was
+    exposed. Does nothing without a window, or while ``render_frames`` owns it.
+    """
+    win = pygame.display.get_surface()
+    if win is None or FRAME_EXCHANGE is not None:
+        return
+    pump_events()
+    if SCREEN_REGIONS.surface is None:
+        SCREEN_REGIONS.update(win, SCREEN_REGIONS.drawn)
+
+
+class FrameProfiler:
+    """Time the phases of every simulation step.
+
+    ``start_frame`` opens a step and each ``lap(phase)`` charges the time since
+    the previous mark to that phase. The last ``window`` samples of each phase
+    feed the rolling figures in the panel. Every step is also kept in a
+    ``block``-row array (NaN for phases it skipped) that is streamed to a
+    partial file in ``directory`` whenever it fills, so memory stays flat
+    however long a generation runs; ``export`` completes the file as the
+    generation's CSV or JSONL.
+    """
+
+    def __init__(self, directory, fmt="csv", window=120, block=1024):
+        self.directory = directory
+        self.format = fmt
+        self.samples = {phase: deque(maxlen=window) for phase in PROFILE_PHASES}
+        self.rows = np.full((block, len(PROFILE_PHASES)), np.nan)
+        self.steps = 0
+        self._used = 0
+        self._handle = None
+        self._frame = None
+        self._mark = 0.0
+
+    def start_frame(self):
+        self.finish()
+        self._frame = {}
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self._frame[phase] = self._frame.get(phase, 0.0) + (now - self._mark) * 1000
+        self._mark = now
+
+    def finish(self):
+        """Close the open step, if any, and record its timings."""
+        frame, self._frame = self._frame, None
+        if not frame:
+            return
+        for phase, ms in frame.items():
+            self.samples[phase].append(ms)
+        row = self.rows[self._used]
+        row[:] = np.nan
+        for column, phase in enumerate(PROFILE_PHASES):
+            if phase in frame:
+                row[column] = frame[phase]
+        self._used += 1
+        if self._used == len(self.rows):
+            self._flush()
+
+    def _partial_path(self):
+        return os.path.join(self.directory, f"steps.{self.format}.partial")
+
+    def _flush(self):
+        if self._handle is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._handle = open(self._partial_path(), "w", newline="", encoding="utf-8")
+            if self.format == "csv":
+                csv.writer(self._handle).writerow(("step",) + tuple(f"{phase}_ms" for phase in PROFILE_PHASES))
+        # NaN (which never equals itself) marks a phase the step skipped
+        rows = enumerate(self.rows[:self._used].tolist(), start=self.steps)
+        if self.format == "jsonl":
+            self._handle.writelines(
+                json.dumps({"step": step, **{phase: round(ms, 4) for phase, ms in zip(PROFILE_PHASES, row) if ms == ms}})
+                + "\n" for step, row in rows)
+        else:
+            csv.writer(self._handle).writerows([step] + [f"{ms:.4f}" if ms == ms else "" for ms in row] for step, row in rows)
+        self.steps += self._used
+        self._used = 0
+
+    def summary(self):
+        """Return ``{phase: (average_ms, p95_ms)}`` over the rolling window of each timed phase."""
+        result = {}
+        for phase in PROFILE_PHASES:
+            values = sorted(self.samples[phase])
+            if values:
+                # nearest-rank percentile
+                p95 = values[-(-len(values) * 95 // 100) - 1]
+                result[phase] = (sum(values) / len(values), p95)
+        return result
+
+    def export(self, generation):
+        """Complete this generation's steps as ``generation_NNNN.<format>`` and start afresh."""
+        self.finish()
+        self._flush()
+        self._handle.close()
+        self._handle = None
+        self.steps = 0
+        path = os.path.join(self.directory, f"generation_{generation:04d}.{self.format}")
+        os.replace(self._partial_path(), path)
+        return path
+
+
+def trajectory_dtype(birds, pipe_slots=TRAJECTORY_PIPE_SLOTS):
+    """Return the fixed-width record of one recorded step for a flock of ``birds``."""
+    return np.dtype([
+        ("score", np.int32),
+        ("best_score", np.int32),
+        ("fitness", np.float64),
+        ("elapsed", np.float32),
+        ("pipe_speed", np.float32),
+        ("pipe_index", np.uint8),
+        ("pipe_count", np.uint8),
+        ("pipe_x", np.float32, (pipe_slots,)),
+        ("pipe_height", np.int16, (pipe_slots,)),
+        ("y", np.float32, (birds,)),
+        ("tilt", np.int16, (birds,)),
+        ("frame", np.uint8, (birds,)),
+        ("action", np.uint8, (birds,)),
+        ("alive", np.bool_, (birds,)),
+    ])
+
+
+def _trajectory_offset(header_size):
+    prefix = len(TRAJECTORY_MAGIC) + 4 + header_size
+    return -(-prefix // TRAJECTORY_ALIGN) * TRAJECTORY_ALIGN
+
+
+def recording_genomes_path(path):
+    """Return where the genomes of the generation recorded at ``path`` are kept."""
+    return os.path.splitext(path)[0] + ".genomes.pkl.gz"
+
+
+class TrajectoryRecorder:
+    """Write every physics step of one generation to a compact binary file.
+
+    The file opens with ``TRAJECTORY_MAGIC``, the length of a JSON header and
+    the header itself (flock size, pipe slots, bird x, first bird id and
+    generation), padded so the steps start on a ``TRAJECTORY_ALIGN`` boundary.
+    Each step is then one ``trajectory_dtype`` record, so any step can be found
+    by offset and ``open_recording`` maps them straight into an array. Steps
+    are gathered ``block`` at a time and written in one call. Only the first
+    ``TRAJECTORY_PIPE_SLOTS`` pipes are kept; later ones are still off screen.
+    As with checkpoints, the genomes saved beside the file are compressed on a
+    background thread that is not a daemon.
+    """
+
+    def __init__(self, path, block=256):
+        self.path = path
+        self.block = block
+        self.steps = 0
+        self._handle = None
+        self._buffer = None
+        self._used = 0
+        self._writer = None
+
+    def _open(self, birds):
+        header = {
+            "version": TRAJECTORY_VERSION,
+            "birds": len(birds),
+            "pipe_slots": TRAJECTORY_PIPE_SLOTS,
+            "x": birds.x,
+            "first_bird": int(birds.identifiers[0]) if len(birds) else 0,
+            "generation": GENERATION,
+        }
+        body = json.dumps(header).encode("utf-8")
+        padding = _trajectory_offset(len(body)) - len(TRAJECTORY_MAGIC) - 4 - len(body)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._handle = open(self.path, "wb")
+        self._handle.write(TRAJECTORY_MAGIC + len(body).to_bytes(4, "little") + body + b" " * padding)
+        self._buffer = np.zeros(self.block, trajectory_dtype(len(birds)))
+        # one view per field, so a step is a row assignment into each column
+        self._columns = {name: self._buffer[name] for name in self._buffer.dtype.names}
+
+    def record(self, birds, pipes, pipe_index, score, elapsed):
+        if self._handle is None:
+            self._open(birds)
+        i = self._used
+        step = self._columns
+        step["score"][i] = score
+        step["best_score"][i] = BEST_SCORE
+        step["fitness"][i] = birds.live_fitness
+        step["elapsed"][i] = elapsed
+        step["pipe_speed"][i] = Pipe.vel
+        step["pipe_index"][i] = pipe_index
+        shown = pipes[:TRAJECTORY_PIPE_SLOTS]
+        step["pipe_count"][i] = len(shown)
+        step["pipe_x"][i] = [pipe.x for pipe in shown] + [0] * (TRAJECTORY_PIPE_SLOTS - len(shown))
+        step["pipe_height"][i] = [pipe.height for pipe in shown] + [0] * (TRAJECTORY_PIPE_SLOTS - len(shown))
+        step["y"][i] = birds.y
+        step["tilt"][i] = birds.tilt
+        step["frame"][i] = birds.frame
+        step["action"][i] = birds.action
+        step["alive"][i] = birds.alive
+        self._used += 1
+        if self._used == self.block:
+            self.flush()
+
+    def flush(self):
+        if self._used:
+            self._buffer[:self._used].tofile(self._handle)
+            self.steps += self._used
+            self._used = 0
+
+    def close(self, genomes=None):
+        """Write the buffered steps and, when given, the genomes the viewer draws networks from."""
+        if self._handle is None:
+            return
+        self.flush()
+        self._handle.close()
+        self._handle = None
+        if genomes is not None:
+            payload = pickle.dumps(genomes, protocol=pickle.HIGHEST_PROTOCOL)
+            self._writer = threading.Thread(target=_write_gzip, args=(recording_genomes_path(self.path), payload),
+                                            name="recording-writer")
+            self._writer.start()
+
+    def wait(self):
+        """Block until the genomes are on disk."""
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+
+
+def open_recording(path):
+    """Return the header of a trajectory file and its steps as a read-only memory map."""
+    with open(path, "rb") as handle:
+        if handle.read(len(TRAJECTORY_MAGIC)) != TRAJECTORY_MAGIC:
+            raise ValueError(f"{path} is not a trajectory recording")
+        size = int.from_bytes(handle.read(4), "little")
+        header = json.loads(handle.read(size))
+    if header["version"] != TRAJECTORY_VERSION:
+        raise ValueError(f"{path} has trajectory version {header['version']}, expected {TRAJECTORY_VERSION}")
+    dtype = trajectory_dtype(header["birds"], header["pipe_slots"])
+    offset = _trajectory_offset(size)
+    # a recording cut short may end in part of a step; it is left out
+    count = max(0, os.path.getsize(path) - offset) // dtype.itemsize
+    if not count:
+        return header, np.zeros(0, dtype)
+    return header, np.memmap(path, dtype, "r", offset=offset, shape=(count,))
+
+
+FrameSnapshot = namedtuple("FrameSnapshot", "birds pipes base score panel_info")
+
+
+class FrameExchange:
+    """Double buffer between a simulation thread and the thread that draws the window.
+
+    The simulation ``publish``es a ``FrameSnapshot`` of copies it never touches
+    again, and the window ``take``s the newest one while it draws the last.
+    A snapshot that was not taken before the next arrives is replaced and
+    counted in ``dropped``, so a slow frame costs stale states, never
+    simulation time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = None
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, snapshot):
+        with self._lock:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+            self.published += 1
+
+    def take(self):
+        """Return the newest unseen snapshot, or ``None``."""
+        with self._lock:
+            snapshot, self._pending = self._pending, None
+        return snapshot
+
+
+def render_frames(exchange, simulation):
+    """Draw the snapshots of ``exchange`` in the window until ``simulation`` ends.
+
+    Runs on the main thread, which SDL needs for the window and its events, so
+    closing the window and the speed keys keep working however long a step
+    takes. The last frame is drawn again when the window is exposed.
+    """
+    win = ensure_window()
+    clock = pygame.time.Clock()
+    shown = None
+    while simulation.is_alive():
+        clock.tick(DISPLAY_FPS)
+        pump_events()
+        snapshot = exchange.take()
+        if snapshot is None and SCREEN_REGIONS.surface is None:
+            snapshot = shown
+        if snapshot is not None:
+            drawWindow(win, snapshot.birds, snapshot.pipes, snapshot.base, snapshot.score, snapshot.panel_info)
+            shown = snapshot
 
 
 def ensure_window():
@@ -64,7 +737,12 @@ def ensure_window():
 
 
 def _compute_node_layers(genome, config):
-    """Return depth assignment for every node based on enabled connections."""
+    """Return depth assignment for every node based on enabled connections.
+
+    The layering depends only on the topology, so it is cached per genome key,
+    node keys and enabled connection keys; the returned ``layers`` are shared
+    and must not be modified.
+    """
     if genome is None or config is None:
         return {}, {}
 
@@ -75,56 +753,76 @@ def _compute_node_layers(genome, config):
         key: cg for key, cg in genome.connections.items() if cg.enabled
     }
 
-    node_ids = set(input_keys) | set(output_keys) | set(genome.nodes.keys())
-    for in_node, out_node in enabled_connections.keys():
+    # ordered, because with a cycle the result depends on the edge order
+    key = (genome.key, tuple(genome.nodes), tuple(enabled_connections), input_keys, output_keys)
+    layers = LAYER_CACHE.get(key)
+    if layers is not None:
+        LAYER_CACHE.move_to_end(key)
+        return layers, enabled_connections
+
+    layers = _layer_nodes(input_keys, output_keys, genome.nodes.keys(), enabled_connections)
+    LAYER_CACHE[key] = layers
+    if len(LAYER_CACHE) > LAYER_CACHE_SIZE:
+        LAYER_CACHE.popitem(last=False)
+    return layers, enabled_connections
+
+
+def _layer_nodes(input_keys, output_keys, hidden_keys, connections):
+    """Group nodes by their longest path from a source; outputs share the last layer.
+
+    An iterative depth-first walk over an index of incoming edges, so deep
+    topologies cannot hit the recursion limit. A node reached again while it is
+    still being resolved (a cycle) counts as depth 0 at that point.
+    """
+    node_ids = set(input_keys) | set(output_keys) | set(hidden_keys)
+    incoming = {}
+    for in_node, out_node in connections:
         node_ids.add(in_node)
         node_ids.add(out_node)
+        incoming.setdefault(out_node, []).append(in_node)
 
     depth_cache = {}
+    on_stack = set()
 
-    def resolve_depth(node_id, stack):
+    def enter(node_id, frames):
+        """Resolve ``node_id`` at once if possible, else push a frame and return None."""
         if node_id in depth_cache:
             return depth_cache[node_id]
-
-        if node_id in input_keys or node_id not in node_ids:
-            depth_cache[node_id] = 0
-            return 0
-
-        # Prevent pathological cycles by bailing out
-        if node_id in stack:
-            depth_cache[node_id] = 0
-            return depth_cache[node_id]
-
-        incoming = [src for (src, dst) in enabled_connections if dst == node_id]
-        if not incoming:
+        sources = incoming.get(node_id)
+        if node_id in input_keys or node_id in on_stack or not sources:
             depth_cache[node_id] = 0
             return 0
-
-        stack.add(node_id)
-        depth = 0
-        for src in incoming:
-            depth = max(depth, resolve_depth(src, stack) + 1)
-        stack.discard(node_id)
-
-        depth_cache[node_id] = depth
-        return depth
+        on_stack.add(node_id)
+        frames.append([node_id, sources, 0, 0])
+        return None
 
     for node in node_ids:
-        resolve_depth(node, set())
-
-    if depth_cache:
-        max_depth = max(depth_cache.values())
-    else:
-        max_depth = 0
-
+        frames = []
+        enter(node, frames)
+        while frames:
+            frame = frames[-1]
+            node_id, sources, position, depth = frame
+            if position < len(sources):
+                frame[2] += 1
+                source_depth = enter(sources[position], frames)
+                if source_depth is not None:
+                    frame[3] = max(depth, source_depth + 1)
+                continue
+
+            frames.pop()
+            on_stack.discard(node_id)
+            depth_cache[node_id] = depth
+            if frames:
+                frames[-1][3] = max(frames[-1][3], depth + 1)
+
+    max_depth = max(depth_cache.values(), default=0)
     for output in output_keys:
         depth_cache[output] = max_depth
 
     layers = {}
     for node, depth in depth_cache.items():
         layers.setdefault(depth, []).append(node)
-
-    return layers, enabled_connections
+    return layers
 
 
 def _node_label(node_id):
@@ -139,7 +837,37 @@ def _node_label(node_id):
     return f"H{node_id}"
 
 
+def _diagram_fingerprint(genome):
+    """Everything the diagram depends on: node ids and each connection's weight and state."""
+    if genome is None:
+        return None
+    connections = tuple(sorted(
+        (key, cg.weight, cg.enabled) for key, cg in genome.connections.items()
+    ))
+    return genome.key, tuple(sorted(genome.nodes.keys())), connections
+
+
 def render_network_diagram(genome, config, width, height):
+    """Return a pygame surface with a schematic of the given genome.
+
+    Diagrams are cached by genome and connection fingerprint, so a leader that
+    has not changed costs one lookup per frame. The returned surface is shared
+    and must not be drawn on.
+    """
+    key = (_diagram_fingerprint(genome), id(config), width, height)
+    surface = DIAGRAM_CACHE.get(key)
+    if surface is not None:
+        DIAGRAM_CACHE.move_to_end(key)
+        return surface
+
+    surface = _draw_network_diagram(genome, config, width, height)
+    DIAGRAM_CACHE[key] = surface
+    if len(DIAGRAM_CACHE) > DIAGRAM_CACHE_SIZE:
+        DIAGRAM_CACHE.popitem(last=False)
+    return surface
+
+
+def _draw_network_diagram(genome, config, width, height):
     """Create a pygame surface with a schematic of the given genome."""
     surface = pygame.Surface((width, height))
 
@@ -150,13 +878,13 @@ def render_network_diagram(genome, config, width, height):
         pygame.draw.line(surface, (shade, shade + 3, shade + 8), (0, y), (width, y))
 
     if genome is None or config is None:
-        text = diagramMessageFont.render("Network unavailable", True, (160, 180, 210))
+        text = ASSETS["diagramMessageFont"].render("Network unavailable", True, (160, 180, 210))
         surface.blit(text, (10, height // 2 - text.get_height() // 2))
         return surface
 
     layers, connections = _compute_node_layers(genome, config)
     if not layers:
-        text = diagramMessageFont.render("No active topology", True, (160, 180, 210))
+        text = ASSETS["diagramMessageFont"].render("No active topology", True, (160, 180, 210))
         surface.blit(text, (10, height // 2 - text.get_height() // 2))
         return surface
 
@@ -200,7 +928,7 @@ def render_network_diagram(genome, config, width, height):
         # annotate weight near the middle of the connection
         mid_x = (start[0] + end[0]) // 2
         mid_y = (start[1] + end[1]) // 2
-        weight_text = diagramLabelFont.render(f"{weight:.2f}", True, (210, 215, 235))
+        weight_text = ASSETS["diagramLabelFont"].render(f"{weight:.2f}", True, (210, 215, 235))
         text_rect = weight_text.get_rect(center=(mid_x, mid_y - 12))
         surface.blit(weight_text, text_rect)
 
@@ -218,15 +946,191 @@ def render_network_diagram(genome, config, width, height):
         pygame.draw.circle(surface, (240, 245, 255), (x, y), node_radius, 1)
 
         label = _node_label(node)
-        text = diagramLabelFont.render(label, True, (230, 235, 250))
+        text = ASSETS["diagramLabelFont"].render(label, True, (230, 235, 250))
         text_rect = text.get_rect(center=(x, y))
         surface.blit(text, text_rect)
 
     return surface
 
 
+def _batched_sigmoid(z):
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _batched_tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+
+def _batched_relu(z):
+    return np.where(z > 0.0, z, 0.0)
+
+
+def _batched_sin(z):
+    return np.sin(np.clip(5.0 * z, -60.0, 60.0))
+
+
+def _batched_gauss(z):
+    z = np.clip(z, -3.4, 3.4)
+    return np.exp(-5.0 * z ** 2)
+
+
+# NumPy twins of neat's built-in activations, element for element
+BATCHED_ACTIVATIONS = {
+    "sigmoid": _batched_sigmoid,
+    "tanh": _batched_tanh,
+    "relu": _batched_relu,
+    "sin": _batched_sin,
+    "gauss": _batched_gauss,
+    "identity": lambda z: z,
+    "clamped": lambda z: np.clip(z, -1.0, 1.0),
+    "abs": np.abs,
+    "square": lambda z: z ** 2,
+    "cube": lambda z: z ** 3,
+}
+
+
+class _NetworkGroup:
+    """Networks sharing one padded shape: ``nodes`` evaluated nodes of up to ``links`` inputs."""
+
+    def __init__(self, nodes, links, num_inputs, num_outputs):
+        self.nodes = nodes
+        self.links = links
+        self.width = num_inputs + nodes + 1  # last column stays 0.0 for unreachable outputs
+        self.members = []
+        self.sources = []
+        self.weights = []
+        self.bias = []
+        self.response = []
+        self.activation = []
+        self.outputs = []
+
+    def freeze(self):
+        count = len(self.members)
+        self.members = np.array(self.members, dtype=np.int64)
+        self.sources = np.array(self.sources, dtype=np.int64).reshape(count, self.nodes, self.links)
+        self.weights = np.array(self.weights, dtype=float).reshape(count, self.nodes, self.links)
+        self.bias = np.array(self.bias, dtype=float).reshape(count, self.nodes)
+        self.response = np.array(self.response, dtype=float).reshape(count, self.nodes)
+        names = sorted(set(self.activation))
+        self.functions = [BATCHED_ACTIVATIONS[name] for name in names]
+        codes = [names.index(name) for name in self.activation]
+        self.activation = np.array(codes, dtype=np.int64).reshape(count, self.nodes)
+        self.outputs = np.array(self.outputs, dtype=np.int64).reshape(count, -1)
+
+    def activate(self, rows, inputs):
+        """Evaluate the networks at positions ``rows`` of the group on ``inputs``."""
+        count = len(rows)
+        values = np.zeros((count, self.width))
+        values[:, :inputs.shape[1]] = inputs
+        sources = self.sources[rows]
+        weights = self.weights[rows]
+        bias = self.bias[rows]
+        response = self.response[rows]
+        activation = self.activation[rows]
+        row_index = np.arange(count)
+        column = inputs.shape[1]
+        for node in range(self.nodes):
+            # accumulate link by link, in genome order, exactly like sum() over a list
+            total = np.zeros(count)
+            for link in range(self.links):
+                total = total + values[row_index, sources[:, node, link]] * weights[:, node, link]
+            z = bias[:, node] + response[:, node] * total
+            if len(self.functions) == 1:
+                values[:, column + node] = self.functions[0](z)
+                continue
+            codes = activation[:, node]
+            for code, function in enumerate(self.functions):
+                chosen = codes == code
+                if chosen.any():
+                    values[chosen, column + node] = function(z[chosen])
+        return values[row_index[:, None], self.outputs[rows]]
+
+
+class NetworkBatch:
+    """Feed-forward networks of a whole population compiled into padded NumPy arrays.
+
+    Each genome is laid out the way ``neat.nn.FeedForwardNetwork.create`` orders
+    it, then networks with the same number of evaluated nodes and the same
+    maximum fan-in are stacked into one group, so a frame costs a handful of
+    array operations per group instead of a Python call per bird. Weighted
+    inputs are summed in the same order as neat does, so outputs match
+    ``FeedForwardNetwork.activate`` to within float rounding of the activation
+    functions. Only the ``sum`` aggregation and the activations in
+    ``BATCHED_ACTIVATIONS`` can be compiled.
+    """
+
+    def __init__(self, genomes, config):
+        genome_config = config.genome_config
+        self.input_keys = list(genome_config.input_keys)
+        self.output_keys = list(genome_config.output_keys)
+        self.size = len(genomes)
+        self.groups = {}
+        self.group_of = np.zeros(self.size, dtype=np.int64)
+        self.position = np.zeros(self.size, dtype=np.int64)
+
+        shapes = []
+        for index, genome in enumerate(genomes):
+            layout = self._layout(genome, genome_config)
+            shape = (len(layout), max((len(links) for _, _, _, _, links in layout), default=0))
+            group = self.groups.get(shape)
+            if group is None:
+                group = _NetworkGroup(shape[0], max(shape[1], 1), len(self.input_keys), len(self.output_keys))
+                self.groups[shape] = group
+                shapes.append(shape)
+            self.group_of[index] = shapes.index(shape)
+            self.position[index] = len(group.members)
+            self._add(group, index, layout)
+
+        self.groups = [self.groups[shape] for shape in shapes]
+        for group in self.groups:
+            group.freeze()
+
+    def _layout(self, genome, genome_config):
+        connections = [cg.key for cg in genome.connections.values() if cg.enabled]
+        layers = neat.graphs.feed_forward_layers(genome_config.input_keys, genome_config.output_keys, connections)
+        layout = []
+        for layer in layers:
+            for node in layer:
+                links = [(inode, genome.connections[(inode, onode)].weight) for inode, onode in connections if onode == node]
+                gene = genome.nodes[node]
+                if gene.aggregation != "sum":
+                    raise ValueError(f"aggregation '{gene.aggregation}' cannot be batched")
+                if gene.activation not in BATCHED_ACTIVATIONS:
+                    raise ValueError(f"activation '{gene.activation}' cannot be batched")
+                layout.append((node, gene.activation, gene.bias, gene.response, links))
+        return layout
+
+    def _add(self, group, index, layout):
+        columns = {key: i for i, key in enumerate(self.input_keys)}
+        for node, _, _, _, _ in layout:
+            columns[node] = len(columns)
+        empty = group.width - 1
+
+        group.members.append(index)
+        for node, activation, bias, response, links in layout:
+            padding = group.links - len(links)
+            group.sources.extend([columns[src] for src, _ in links] + [empty] * padding)
+            group.weights.extend([weight for _, weight in links] + [0.0] * padding)
+            group.bias.append(bias)
+            group.response.append(response)
+            group.activation.append(activation)
+        group.outputs.append([columns.get(key, empty) for key in self.output_keys])
+
+    def activate(self, indices, inputs):
+        """Return the outputs of networks ``indices`` for the matching rows of ``inputs``."""
+        indices = np.asarray(indices, dtype=np.int64)
+        inputs = np.asarray(inputs, dtype=float)
+        outputs = np.zeros((len(indices), len(self.output_keys)))
+        group_of = self.group_of[indices]
+        for number, group in enumerate(self.groups):
+            chosen = np.flatnonzero(group_of == number)
+            if chosen.size:
+                outputs[chosen] = group.activate(self.position[indices[chosen]], inputs[chosen])
+        return outputs
+
+
 class Bird:
-    IMGs = birdIMGs
     maxRotation = 25
     rotVel = 20
     animationTime = 5
@@ -240,6 +1144,8 @@ class Bird:
         self.vel = 0
         self.height = self.y
         self.imgCount = 0
+        self.IMGs = ASSETS["birdIMGs"]
+        self.MASKs = ASSETS["birdMasks"]
         self.img = self.IMGs[0]
         self.identifier = Bird._id_counter
         Bird._id_counter += 1
@@ -274,7 +1180,8 @@ class Bird:
             self.last_action = "Glide"
 
 
-    def Draw(self,win):
+    def animate(self):
+        """Advance the flap animation; the current frame also drives collisions."""
         self.imgCount +=1
 
         if self.imgCount < self.animationTime:
@@ -293,32 +1200,298 @@ class Bird:
             self.img = self.IMGs[1]
             self.imgCount = self.animationTime*2
 
-        rotateImage = pygame.transform.rotate(self.img,self.tilt)
-        newReact = rotateImage.get_rect(center= self.img.get_rect(topleft = (self.x,self.y)).center)
+    def Draw(self,win):
+        self.animate()
+        rotateImage, offset, _ = ASSETS["birdAtlas"].get(self.IMGs.index(self.img),self.tilt)
+        newReact = self.img.get_rect(topleft = (self.x,self.y)).move(offset)
         win.blit(rotateImage,newReact.topleft)
 
+    @staticmethod
+    def reachableTilts():
+        """Every tilt move() can produce for a bird that starts level."""
+        tilts = set()
+        pending = [0]
+        while pending:
+            tilt = pending.pop()
+            if tilt in tilts:
+                continue
+            tilts.add(tilt)
+            pending.append(max(tilt, Bird.maxRotation))
+            if tilt > -90:
+                pending.append(tilt - Bird.rotVel)
+        return sorted(tilts)
+
     def getMask(self):
-        return pygame.mask.from_surface(self.img)
+        # collisions use the upright sprite of the current frame, never the tilted one
+        return self.MASKs[self.IMGs.index(self.img)]
+
+
+class SpriteAtlas:
+    """Rotated copies of animation frames with their masks and blit offsets.
+
+    Entries are keyed by ``(frame, tilt)``. ``offset`` moves the top-left of the
+    upright sprite to the top-left of the rotated one, which keeps the rotation
+    centred exactly as ``rotated.get_rect(center=...)`` would. Tilts that were
+    not prepared up front are rotated on first use and kept.
+    """
+
+    def __init__(self, images, tilts=()):
+        self.images = images
+        self.entries = {}
+        for frame in range(len(images)):
+            for tilt in tilts:
+                self.get(frame, tilt)
+
+    def get(self, frame, tilt):
+        """Return ``(surface, offset, mask)`` for an animation frame at a tilt."""
+        entry = self.entries.get((frame, tilt))
+        if entry is None:
+            image = self.images[frame]
+            surface = pygame.transform.rotate(image, tilt)
+            offset = surface.get_rect(center=image.get_rect().center).topleft
+            entry = (surface, offset, pygame.mask.from_surface(surface))
+            self.entries[(frame, tilt)] = entry
+        return entry
+
+
+BIRD_ACTIONS = ("Glide", "Jump", "Climb", "Dive")
+GLIDE, JUMP, CLIMB, DIVE = range(len(BIRD_ACTIONS))
+
+
+class BirdPopulation:
+    """Structure-of-arrays flock that advances every bird in one NumPy step.
+
+    Each bird is an index into the state arrays. ``move``, ``animate`` and
+    ``out_of_bounds`` apply the same rules as ``Bird.move``/``Bird.animate`` and
+    the bounds check in ``main`` element-wise, so thousands of birds can be
+    stepped without a per-bird Python loop. Dead birds keep their slot, so an
+    index names the same bird (and genome) for the whole run; ``kill`` clears
+    their ``alive`` flag and the compact list of live indices that every step
+    works from, so the per-frame cost follows the survivors rather than the
+    population size.
+
+    Every reward goes to all live birds at once, so they always share one
+    fitness value: ``live_fitness`` is that running total, and a bird's slot in
+    ``fitness`` is only written when it dies (or by ``settle``). The best,
+    average and top-k of the live birds therefore cost O(1) and O(k).
+
+    With ``worlds`` above one the flock holds ``count`` birds for each of that
+    many independent courses, world after world, and ``world_fitness`` keeps
+    one running total per world (see ``play_courses``).
+    """
+
+    def __init__(self, count, x=230, y=350, worlds=1):
+        self.x = x
+        self.world = np.repeat(np.arange(worlds), count)
+        self.world_fitness = np.zeros(worlds)
+        count *= worlds
+        self.y = np.full(count, float(y))
+        self.vel = np.zeros(count)
+        self.tick_count = np.zeros(count, dtype=np.int64)
+        self.height = self.y.copy()
+        self.tilt = np.zeros(count)
+        self.img_count = np.zeros(count, dtype=np.int64)
+        self.frame = np.zeros(count, dtype=np.int64)
+        self.action = np.full(count, GLIDE, dtype=np.int8)
+        self.fitness = np.zeros(count)
+        self.alive = np.ones(count, dtype=bool)
+        self._alive_idx = np.arange(count)
+        self.identifiers = np.arange(Bird._id_counter, Bird._id_counter + count)
+        Bird._id_counter += count
+        self.frame_heights = np.array([img.get_height() for img in ASSETS["birdIMGs"]])
+        self.max_width = max(img.get_width() for img in ASSETS["birdIMGs"])
+
+    def __len__(self):
+        return len(self.y)
+
+    def alive_indices(self):
+        """Return the indices of live birds in ascending order; treat the array as read-only."""
+        if self._alive_idx is None:
+            self._alive_idx = np.flatnonzero(self.alive)
+        return self._alive_idx
+
+    def alive_count(self):
+        return len(self.alive_indices())
+
+    @property
+    def live_fitness(self):
+        """The fitness every live bird of a single-world flock shares."""
+        return float(self.world_fitness[0])
+
+    def reward(self, amount, world=None):
+        """Add ``amount`` to the fitness of every live bird, or only those of ``world``."""
+        if world is None:
+            self.world_fitness += amount
+        else:
+            self.world_fitness[world] += amount
+
+    def kill(self, idx, penalty=0):
+        """Mark the birds at ``idx`` dead, freezing their fitness less ``penalty``."""
+        self.fitness[idx] = self.world_fitness[self.world[idx]] - penalty
+        self.alive[idx] = False
+        self._alive_idx = None
+
+    def settle(self):
+        """Write the shared fitness into the slots of the birds still alive."""
+        idx = self.alive_indices()
+        self.fitness[idx] = self.world_fitness[self.world[idx]]
+
+    def jump(self, idx):
+        self.vel[idx] = -10.5
+        self.tick_count[idx] = 0
+        self.height[idx] = self.y[idx]
+        self.action[idx] = JUMP
+
+    def move(self):
+        idx = self.alive_indices()
+        tick_count = self.tick_count[idx] + 1
+        self.tick_count[idx] = tick_count
+
+        d = self.vel[idx] * tick_count + 1.5 * tick_count ** 2
+        d = np.minimum(d, 16)
+        d = np.where(d < 0, d - 2, d)
+
+        y = self.y[idx] + d
+        self.y[idx] = y
+
+        tilt = self.tilt[idx]
+        climbing = (d < 0) | (y < self.height[idx] + 50)
+        diving = ~climbing & (tilt > -90)
+        tilt = np.where(climbing & (tilt < Bird.maxRotation), Bird.maxRotation, tilt)
+        self.tilt[idx] = np.where(diving, tilt - Bird.rotVel, tilt)
+        self.action[idx] = np.select([climbing, diving], [CLIMB, DIVE], GLIDE)
+
+    def animate(self):
+        """Advance the flap animation of every live bird, as ``Bird.animate`` does."""
+        idx = self.alive_indices()
+        img_count = self.img_count[idx] + 1
+        step = Bird.animationTime
+
+        wrap = img_count == step * 4 + 1
+        frame = np.select(
+            [img_count < step, img_count < step * 2, img_count < step * 3, img_count < step * 4, wrap],
+            [0, 1, 2, 1, 0],
+            self.frame[idx],
+        )
+        img_count = np.where(wrap, 0, img_count)
+
+        nose_dive = self.tilt[idx] <= -80
+        self.frame[idx] = np.where(nose_dive, 1, frame)
+        self.img_count[idx] = np.where(nose_dive, step * 2, img_count)
+
+    def out_of_bounds(self, floor=730):
+        """Return the indices of live birds that hit the floor or left the top of the screen."""
+        idx = self.alive_indices()
+        y = self.y[idx]
+        return idx[(y + self.frame_heights[self.frame[idx]] >= floor) | (y < 0)]
+
+    def collide(self, pipe, idx=None):
+        """Return the indices of live birds (or of the birds ``idx``) overlapping ``pipe``.
+
+        Every bird shares one column, so a pipe that is not level with it is
+        rejected outright. Otherwise only birds whose bounding box reaches into
+        the top or bottom pipe get the pixel-exact mask test.
+        """
+        if not pipe.spans(self.x, self.max_width):
+            return np.empty(0, dtype=np.int64)
+
+        if idx is None:
+            idx = self.alive_indices()
+        y = self.y[idx]
+        top = np.round(y)
+        bottom = top + self.frame_heights[self.frame[idx]]
+        near = pipe.reaches(top, bottom)
+        masks = ASSETS["birdMasks"]
+        hits = [i for i, bird_y in zip(idx[near].tolist(), y[near].tolist())
+                if pipe.collideMask(masks[self.frame[i]], self.x, bird_y)]
+        return np.array(hits, dtype=np.int64)
+
+    def draw(self, win):
+        """Blit every live bird and return the rect bounding them, or ``None``."""
+        idx = self.alive_indices()
+        return _draw_flock(win, self.x, self.y[idx], self.frame[idx], self.tilt[idx])
+
+    def snapshot(self):
+        """Return a read-only copy of the live birds that can be drawn from another thread."""
+        idx = self.alive_indices()
+        state = [self.y[idx], self.frame[idx], self.tilt[idx]]
+        for column in state:
+            column.flags.writeable = False
+        return FlockSnapshot(self.x, *state)
+
+
+def _draw_flock(win, x, y, frames, tilts):
+    # same rounding as assigning a float to Rect.topleft: half away from zero
+    top = (np.sign(y) * np.floor(np.abs(y) + 0.5)).astype(np.int64)
+    atlas = ASSETS["birdAtlas"]
+    sprites = []
+    for frame, tilt, row in zip(frames.tolist(), tilts.tolist(), top.tolist()):
+        surface, (dx, dy), _ = atlas.get(frame, tilt)
+        sprites.append((surface, (x + dx, row + dy)))
+    rects = win.blits(sprites)
+    return rects[0].unionall(rects[1:]) if rects else None
+
+
+class FlockSnapshot(namedtuple("FlockSnapshot", "x y frame tilt")):
+    """The live birds of one step as ``BirdPopulation.snapshot`` froze them."""
+
+    def draw(self, win):
+        return _draw_flock(win, self.x, self.y, self.frame, self.tilt)
+
+
+class Course:
+    """Seeded sequence of pipe gap heights, indexable by pipe number.
+
+    Heights are produced lazily in fixed-size blocks, each drawn from its own
+    generator seeded with ``(seed, block)``, so any pipe can be reached without
+    replaying the ones before it and the global ``random`` state is never
+    touched. A course pickles as its seed plus a compact int16 array, which makes
+    it cheap to hand to worker processes.
+    """
+
+    low = 50
+    high = 450
+    block_size = 256
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.heights = np.empty(0, dtype=np.int16)
+
+    def _block(self, block):
+        rng = np.random.default_rng([self.seed, block])
+        return rng.integers(self.low, self.high, size=self.block_size, dtype=np.int16)
+
+    def __getitem__(self, index):
+        if index < 0:
+            raise IndexError("course index must be non-negative")
+        while index >= len(self.heights):
+            block = len(self.heights) // self.block_size
+            self.heights = np.concatenate([self.heights, self._block(block)])
+        return int(self.heights[index])
+
 
 class Pipe:
     gap = 200
     vel = 5
 
-    def __init__(self,x):
+    def __init__(self,x,height=None):
         self.x = x
         self.height = 0
         self.gap = 200
 
         self.top = 0
         self.bottom = 0
-        self.pipeTop = pygame.transform.flip(pipeIMG,False,True)
-        self.pipeBot = pipeIMG
+        self.pipeTop = ASSETS["pipeTopIMG"]
+        self.pipeBot = ASSETS["pipeIMG"]
+        self.topMask = ASSETS["pipeTopMask"]
+        self.botMask = ASSETS["pipeBotMask"]
 
         self.passed = False
-        self.setHeight()
+        self.setHeight(height)
 
-    def setHeight(self):
-        self.height = random.randrange(50,450)
+    def setHeight(self,height=None):
+        # courses supply the height; a bare Pipe still draws its own
+        self.height = random.randrange(50,450) if height is None else height
         self.top = self.height - self.pipeTop.get_height()
         self.bot = self.height + self.gap
 
@@ -326,19 +1499,30 @@ class Pipe:
         self.x -= self.vel
 
     def draw(self,win):
-        win.blit(self.pipeTop, (self.x, self.top))
-        win.blit(self.pipeBot, (self.x, self.bot))
+        return [(self.pipeTop, win.blit(self.pipeTop, (self.x, self.top))),
+                (self.pipeBot, win.blit(self.pipeBot, (self.x, self.bot)))]
 
     def collide(self,bird):
-        birdMask = bird.getMask()
-        topMask = pygame.mask.from_surface(self.pipeTop)
-        botMask = pygame.mask.from_surface(self.pipeBot)
+        return self.collideMask(bird.getMask(),bird.x,bird.y)
+
+    def spans(self,x,width):
+        """Return whether the pipe column overlaps a sprite at x of the given width."""
+        return self.x < x + width and x < self.x + self.pipeTop.get_width()
+
+    def reaches(self,top,bottom):
+        """Return whether sprite rows [top, bottom) overlap either pipe's box; works on arrays."""
+        pipeHeight = self.pipeTop.get_height()
+        return ((top < self.height) & (bottom > self.top)) | ((top < self.bot + pipeHeight) & (bottom > self.bot))
 
-        topOffset = (self.x - bird.x, self.top - round(bird.y))
-        botOffset = (self.x - bird.x, self.bot - round(bird.y))
+    def collideMask(self,birdMask,x,y):
+        if not self.spans(x,birdMask.get_size()[0]):
+            return False
 
-        bPoint = birdMask.overlap(botMask,botOffset)
-        tPoint = birdMask.overlap(topMask,topOffset)
+        topOffset = (self.x - x, self.top - round(y))
+        botOffset = (self.x - x, self.bot - round(y))
+
+        bPoint = birdMask.overlap(self.botMask,botOffset)
+        tPoint = birdMask.overlap(self.topMask,topOffset)
 
         if tPoint or bPoint:
             return True
@@ -347,10 +1531,10 @@ class Pipe:
 
 class Base:
     vel = 5
-    width = baseIMG.get_width()
-    img = baseIMG
 
     def __init__(self,y):
+        self.img = ASSETS["baseIMG"]
+        self.width = self.img.get_width()
         self.y = y
         self.x1 = 0
         self.x2 = self.width
@@ -365,43 +1549,113 @@ class Base:
             self.x2 = self.x1 + self.width
 
     def draw(self,win):
-        win.blit(self.img,(self.x1,self.y))
-        win.blit(self.img,(self.x2,self.y))
+        return [(self.img, win.blit(self.img,(self.x1,self.y))),
+                (self.img, win.blit(self.img,(self.x2,self.y)))]
+
+class ScreenRegions:
+    """Push only the parts of the window that changed to the display.
+
+    Every frame is still drawn in full into the window surface; ``update``
+    takes a ``(content, rect)`` pair for each thing drawn and compares it with
+    the previous frame. A pair that appeared or disappeared marks its rect
+    dirty, so static pixels (the background, unchanged panel lines, a cached
+    diagram) are never sent again. ``invalidate`` forces the next update to
+    cover the whole window, e.g. after the window was exposed.
+    """
+
+    def __init__(self):
+        self.surface = None
+        self.regions = {}
+        self.drawn = []
+
+    def invalidate(self):
+        self.surface = None
+
+    def update(self, win, drawn):
+        # contents are compared by identity; keeping last frame's objects alive
+        # means no new object can reuse one of their ids
+        regions = {(id(content), tuple(rect)): rect for content, rect in drawn}
+        if self.surface is not win:
+            pygame.display.update()
+        else:
+            dirty = [rect for key, rect in regions.items() if key not in self.regions]
+            dirty.extend(rect for key, rect in self.regions.items() if key not in regions)
+            if dirty:
+                pygame.display.update(dirty)
+        self.surface = win
+        self.regions = regions
+        self.drawn = drawn
+
+
+SCREEN_REGIONS = ScreenRegions()
+
 
 def drawWindow(win,birds,pipes,base,score,panel_info):
-    win.blit(BGIMG,(0,0))
+    background = ASSETS["BGIMG"]
+    drawn = [(background, win.blit(background,(0,0)))]
     for pipe in pipes:
-        pipe.draw(win)
+        drawn.extend(pipe.draw(win))
 
-    base.draw(win)
+    drawn.extend(base.draw(win))
 
-    for bird in birds:
-        bird.Draw(win)
+    flock = birds.draw(win)
+    if flock is not None:
+        # birds move and flap every frame, so their area is always dirty
+        drawn.append((object(), flock))
 
-    draw_panel(win, panel_info)
+    if panel_info.get("sim_speed", "1x") != "1x":
+        speed = render_text(ASSETS["statFont"], panel_info["sim_speed"], (255, 255, 255))
+        drawn.append((speed, win.blit(speed, (WIDTH - speed.get_width() - 10, 10))))
 
-    pygame.display.update()
+    drawn.extend(draw_panel(win, panel_info))
 
+    SCREEN_REGIONS.update(win, drawn)
 
-def draw_panel(win, info):
-    """Render the side panel that visualises NEAT training progress."""
-    panel_x = WIDTH
+
+def _panel_background():
+    """Return the static part of the panel and the y offset where live content starts.
+
+    The gradient, border, title and rule never change, so they are drawn once.
+    """
+    global PANEL_BACKGROUND
+    if PANEL_BACKGROUND is not None:
+        return PANEL_BACKGROUND
+
+    surface = pygame.Surface((PANEL_WIDTH, HEIGHT))
     for y in range(HEIGHT):
         blend = y / max(HEIGHT - 1, 1)
         shade = int(18 + blend * 30)
-        pygame.draw.line(win, (shade, shade + 4, shade + 12), (panel_x, y), (panel_x + PANEL_WIDTH, y))
+        pygame.draw.line(surface, (shade, shade + 4, shade + 12), (0, y), (PANEL_WIDTH, y))
 
-    panel_rect = pygame.Rect(panel_x, 0, PANEL_WIDTH, HEIGHT)
-    pygame.draw.rect(win, (70, 90, 160), panel_rect, 2)
+    pygame.draw.rect(surface, (70, 90, 160), surface.get_rect(), 2)
 
     y_offset = 20
-    title = panelTitleFont.render("Evolution Monitor", True, (220, 235, 255))
-    win.blit(title, (panel_x + 20, y_offset))
+    title = ASSETS["panelTitleFont"].render("Evolution Monitor", True, (220, 235, 255))
+    surface.blit(title, (20, y_offset))
     y_offset += title.get_height() + 10
 
-    pygame.draw.line(win, (70, 90, 160), (panel_x + 15, y_offset), (panel_x + PANEL_WIDTH - 15, y_offset), 1)
+    pygame.draw.line(surface, (70, 90, 160), (15, y_offset), (PANEL_WIDTH - 15, y_offset), 1)
     y_offset += 15
 
+    PANEL_BACKGROUND = surface, y_offset
+    return PANEL_BACKGROUND
+
+
+def draw_panel(win, info):
+    """Render the side panel that visualises NEAT training progress.
+
+    Returns a ``(surface, rect)`` pair for everything blitted, for ``ScreenRegions``.
+    """
+    drawn = []
+
+    def blit(surface, pos):
+        drawn.append((surface, win.blit(surface, pos)))
+
+    panel_x = WIDTH
+    font = ASSETS["panelFont"]
+    background, y_offset = _panel_background()
+    blit(background, (panel_x, 0))
+
     metrics = [
         f"Generation        {info['generation']}",
         f"Population        {info['population']}",
@@ -416,13 +1670,13 @@ def draw_panel(win, info):
     ]
 
     for line in metrics:
-        text_surface = panelFont.render(line, True, (210, 220, 250))
-        win.blit(text_surface, (panel_x + 20, y_offset))
+        text_surface = render_text(font, line, (210, 220, 250))
+        blit(text_surface, (panel_x + 20, y_offset))
         y_offset += text_surface.get_height() + 4
 
     y_offset += 10
-    target_title = panelFont.render("Target pipe", True, (160, 190, 255))
-    win.blit(target_title, (panel_x + 20, y_offset))
+    target_title = render_text(font, "Target pipe", (160, 190, 255))
+    blit(target_title, (panel_x + 20, y_offset))
     y_offset += target_title.get_height() + 6
 
     target_lines = [
@@ -433,26 +1687,28 @@ def draw_panel(win, info):
     ]
 
     for line in target_lines:
-        target_surface = panelFont.render(line, True, (190, 205, 245))
-        win.blit(target_surface, (panel_x + 20, y_offset))
+        target_surface = render_text(font, line, (190, 205, 245))
+        blit(target_surface, (panel_x + 20, y_offset))
         y_offset += target_surface.get_height() + 2
 
     y_offset += 10
-    network_title = panelFont.render("Network topology", True, (160, 190, 255))
-    win.blit(network_title, (panel_x + 20, y_offset))
+    network_title = render_text(font, "Network topology", (160, 190, 255))
+    blit(network_title, (panel_x + 20, y_offset))
     y_offset += network_title.get_height() + 6
 
-    diagram_height = 220
+    profile = info.get('profile')
+    # make room for the profile section below
+    diagram_height = 140 if profile else 220
     diagram_width = PANEL_WIDTH - 60
     diagram_surface = render_network_diagram(info.get('best_genome'), info.get('config'), diagram_width, diagram_height)
     diagram_pos = (panel_x + 20, y_offset)
-    win.blit(diagram_surface, diagram_pos)
+    blit(diagram_surface, diagram_pos)
     pygame.draw.rect(win, (70, 90, 160), (*diagram_pos, diagram_width, diagram_height), 1)
     y_offset += diagram_height + 8
 
     y_offset += 10
-    section_title = panelFont.render("Top performers", True, (160, 190, 255))
-    win.blit(section_title, (panel_x + 20, y_offset))
+    section_title = render_text(font, "Top performers", (160, 190, 255))
+    blit(section_title, (panel_x + 20, y_offset))
     y_offset += section_title.get_height() + 6
 
     if info['top_birds']:
@@ -460,224 +1716,1259 @@ def draw_panel(win, info):
             details = (
                 f"Bird {entry['id']}  fit {entry['fitness']:.1f}  y {entry['y']:.0f}"
             )
-            info_line = panelFont.render(details, True, (200, 210, 240))
-            win.blit(info_line, (panel_x + 20, y_offset))
+            info_line = render_text(font, details, (200, 210, 240))
+            blit(info_line, (panel_x + 20, y_offset))
             y_offset += info_line.get_height()
 
             delta = (
                 f"   dx {entry['dx']:.0f}  dy {entry['dy']:.0f}  action {entry['action']}"
             )
-            delta_line = panelFont.render(delta, True, (140, 160, 210))
-            win.blit(delta_line, (panel_x + 20, y_offset))
+            delta_line = render_text(font, delta, (140, 160, 210))
+            blit(delta_line, (panel_x + 20, y_offset))
             y_offset += delta_line.get_height() + 4
     else:
-        info_line = panelFont.render("No birds alive", True, (180, 190, 220))
-        win.blit(info_line, (panel_x + 20, y_offset))
+        info_line = render_text(font, "No birds alive", (180, 190, 220))
+        blit(info_line, (panel_x + 20, y_offset))
         y_offset += info_line.get_height() + 4
 
+    if profile:
+        y_offset += 10
+        profile_title = render_text(font, "Frame profile (avg / p95 ms)", (160, 190, 255))
+        blit(profile_title, (panel_x + 20, y_offset))
+        y_offset += profile_title.get_height() + 6
+
+        cells = [f"{phase.capitalize():<10} {avg:5.2f} / {p95:5.2f}" for phase, (avg, p95) in profile.items()]
+        for i in range(0, len(cells), 2):
+            profile_line = render_text(font, "   ".join(cells[i:i + 2]), (190, 205, 245))
+            blit(profile_line, (panel_x + 20, y_offset))
+            y_offset += profile_line.get_height() + 2
+
     y_offset += 10
-    events_title = panelFont.render("Recent events", True, (160, 190, 255))
-    win.blit(events_title, (panel_x + 20, y_offset))
+    events_title = render_text(font, "Recent events", (160, 190, 255))
+    blit(events_title, (panel_x + 20, y_offset))
     y_offset += events_title.get_height() + 6
 
     if info['events']:
         for event in reversed(info['events'][-6:]):
-            event_surface = panelFont.render(event, True, (150, 170, 215))
-            win.blit(event_surface, (panel_x + 20, y_offset))
+            event_surface = render_text(font, format_event(event), (150, 170, 215))
+            if y_offset + event_surface.get_height() > HEIGHT - 10:
+                break
+            blit(event_surface, (panel_x + 20, y_offset))
             y_offset += event_surface.get_height() + 2
     else:
-        no_event = panelFont.render("Awaiting data...", True, (150, 170, 215))
-        win.blit(no_event, (panel_x + 20, y_offset))
+        no_event = render_text(font, "Awaiting data...", (150, 170, 215))
+        blit(no_event, (panel_x + 20, y_offset))
+
+    return drawn
 
 def main(genomes,config):
-    global GENERATION, BEST_SCORE, ACTIVE_CONFIG
+    """NEAT fitness function: play one generation in the shared window (or headless)."""
+    global GENERATION, ACTIVE_CONFIG
     GENERATION += 1
     EVENT_LOG.clear()
     ACTIVE_CONFIG = config
-    nets = []
+    log_event("generation_started", birds=len(genomes))
+
+    start_time = time.time()
+    courses = [Course(random.randrange(2 ** 32)) for _ in range(COURSE_COUNT)]
+    if len(courses) == 1:
+        recorder = None
+        if RECORD_DIR is not None:
+            recorder = TrajectoryRecorder(os.path.join(RECORD_DIR, f"generation_{GENERATION:04d}.traj"))
+        try:
+            score, peak_fitness, _ = play(genomes, config, HEADLESS, courses[0], PROFILER, recorder=recorder)
+        finally:
+            # a window closed mid-generation still leaves the steps flown so far
+            if recorder is not None:
+                recorder.close([genome for _, genome in genomes])
+    else:
+        score, peak_fitness, _ = play_courses(genomes, config, courses, COURSE_AGGREGATE, window=not HEADLESS)
+    total_elapsed = time.time() - start_time
+    log_event("generation_completed", score=score, fitness=peak_fitness, duration=total_elapsed)
+
+    if len(courses) > 1 and not HEADLESS and genomes:
+        replay_best(genomes, config, courses[0])
+    if PROFILER is not None:
+        PROFILER.export(GENERATION)
+
+
+def replay_best(genomes, config, course, stop=None):
+    """Fly the fittest genome through ``course`` in the window, within ``REPLAY_CAPS``."""
+    key, best = max(genomes, key=lambda item: item[1].fitness)
+    log_event("replay_best", fitness=best.fitness, genome=key)
+    # replay a copy so the fitness NEAT just received stays untouched
+    play([(key, copy.deepcopy(best))], config, course=course, profiler=PROFILER, caps=REPLAY_CAPS, stop=stop)
+
+
+def _frame_metrics(birds, pipes, pipe_index, score, elapsed, population_size):
+    """Return the live numbers the panel shows and telemetry publishes, as plain data."""
+    alive = birds.alive_indices()
+    best_fitness = avg_fitness = birds.live_fitness if alive.size else 0
+    target_pipe_info = {"x": 0.0, "gap_start": 0.0, "gap_centre": 0.0, "gap_end": 0.0}
+    top_birds = []
+    if pipes:
+        target_pipe = pipes[pipe_index]
+        gap_start = target_pipe.height
+        gap_end = target_pipe.bot
+        gap_centre = (gap_start + gap_end) / 2
+        target_pipe_info = {
+            "x": target_pipe.x,
+            "gap_start": gap_start,
+            "gap_centre": gap_centre,
+            "gap_end": gap_end,
+        }
+
+        # live birds tie on fitness, so the leaders are simply the first three
+        for x in alive[:3]:
+            top_birds.append({
+                "id": birds.identifiers[x],
+                "fitness": birds.live_fitness,
+                "y": birds.y[x],
+                "dx": target_pipe.x - birds.x,
+                "dy": gap_centre - birds.y[x],
+                "action": BIRD_ACTIONS[birds.action[x]],
+            })
+
+    score_rate = (score / (elapsed / 60)) if elapsed > 0 else 0
+
+    return {
+        "generation": GENERATION,
+        "population": population_size,
+        "alive": len(alive),
+        "score": score,
+        "best_score": BEST_SCORE,
+        "best_fitness": best_fitness,
+        "avg_fitness": avg_fitness,
+        "score_rate": score_rate,
+        "pipe_speed": Pipe.vel,
+        "elapsed": elapsed,
+        "target_pipe": target_pipe_info,
+        "top_birds": top_birds,
+    }
+
+
+def _cap_reached(caps, step_count, elapsed, stop=None):
+    """Return why a run must end after ``step_count`` steps and ``elapsed`` seconds, or ``None``.
+
+    Only the step and time ``caps`` and ``stop`` end a whole run; the score cap
+    ends one course at a time (see ``_CourseWorld.cap_score``).
+    """
+    if caps["frames"] is not None and step_count >= caps["frames"]:
+        return f"frame cap {caps['frames']}"
+    if caps["seconds"] is not None and elapsed >= caps["seconds"]:
+        return f"time cap {caps['seconds']}s"
+    if stop is not None and stop():
+        return "stop request"
+    return None
+
+
+class _CourseWorld:
+    """The pipes, score and pipe speed of one course, flown by ``play`` or ``play_courses``.
+
+    Each step ``target`` picks the pipe the birds steer by, ``collide`` tests
+    the world's live birds against every pipe and moves the pipes, and
+    ``advance_pipes`` scores passed pipes and recycles them. Events of a world
+    that is one of several carry its ``course`` index.
+    """
+
+    def __init__(self, index, course, tagged=False):
+        self.index = index
+        self.course = course
+        self.tags = {"course": index} if tagged else {}
+        self.vel = 5
+        self.pipes = [self._pipe(600, 0)]
+        self.pipe_count = 1
+        self.score = 0
+        self.pipe_ind = 0
+        self._passed = False
+        self._gone = []
+
+    def _pipe(self, x, number):
+        pipe = Pipe(x, self.course[number])
+        # each course keeps its own speed instead of the shared Pipe.vel
+        pipe.vel = self.vel
+        return pipe
+
+    def target(self, x):
+        """Pick the pipe the birds at ``x`` steer by, before the step."""
+        pipes = self.pipes
+        self.pipe_ind = 1 if len(pipes) > 1 and x > pipes[0].x + pipes[0].pipeTop.get_width() else 0
+        return pipes[self.pipe_ind]
+
+    def cap_score(self, birds, alive, cap):
+        """End the course once its score reaches ``cap``; its live birds ``alive`` keep their fitness.
+
+        Returns the reason it ended, or ``None``.
+        """
+        if cap is None or self.score < cap or not alive.size:
+            return None
+        reason = f"score cap {cap}"
+        log_event("generation_capped", score=self.score, reason=reason, alive=alive.size, **self.tags)
+        birds.kill(alive)
+        return reason
+
+    def collide(self, birds, alive):
+        """Kill the live birds ``alive`` of this world that hit a pipe, note passed pipes and move them all."""
+        self._passed = False
+        self._gone = []
+        for pipe in self.pipes:
+            if alive.size:
+                crashed = birds.collide(pipe, alive)
+                for x in crashed:
+                    log_event("crash", birds.identifiers[x], self.score, birds.world_fitness[self.index], **self.tags)
+                birds.kill(crashed, penalty=1)
+                alive = alive[birds.alive[alive]]
+
+                if not pipe.passed and pipe.x < birds.x:
+                    pipe.passed = True
+                    self._passed = True
+
+            if pipe.x + pipe.pipeTop.get_width() < 0:
+                self._gone.append(pipe)
+
+            pipe.move()
+
+    def advance_pipes(self, birds):
+        """Score a pipe passed in ``collide``, speed the course up and recycle pipes that left the screen."""
+        global BEST_SCORE
+        if self._passed:
+            self.score += 1
+            birds.reward(5, self.index)
+            self.vel += .5
+            for pipe in self.pipes:
+                pipe.vel = self.vel
+            self.pipes.append(self._pipe(700, self.pipe_count))
+            self.pipe_count += 1
+            if self.score > BEST_SCORE:
+                BEST_SCORE = self.score
+                log_event("best_score", score=self.score, **self.tags)
+            else:
+                log_event("score", score=self.score, pipe_speed=self.vel, **self.tags)
+
+        for pipe in self._gone:
+            self.pipes.remove(pipe)
+
+        if not self.pipes:
+            self.pipes.append(self._pipe(700, self.pipe_count))
+            self.pipe_count += 1
+
+        self.pipe_ind = max(0, min(self.pipe_ind, len(self.pipes) - 1))
+
+
+def play(genomes, config, headless=False, course=None, profiler=None, caps=None, recorder=None, stop=None):
+    """Fly every genome through one course and assign its fitness.
+
+    Returns the final score, the peak fitness reached by a live bird and the
+    reason the run was cut short, or ``None`` when every bird died. ``caps``
+    (``GENERATION_CAPS`` when omitted) bounds the number of physics steps, the
+    score and the wall time; birds still flying at a cap keep the fitness they
+    have earned so far, and so do they when ``stop``, asked before every step,
+    returns true. The outcome of each bird depends only on its genome and the ``course`` (a fresh
+    random one when omitted), not on which other birds share the run, so any
+    slice of a population can be played on its own. A ``FrameProfiler`` passed
+    as ``profiler`` times the phases of every step, and a ``TrajectoryRecorder``
+    passed as ``recorder`` writes the state after every step. While
+    ``FRAME_EXCHANGE`` is set, a visual run publishes its frames there for
+    ``render_frames`` instead of drawing them, and never touches the window.
+    """
+    if caps is None:
+        caps = GENERATION_CAPS
     ge = []
-    birds = []
     population_size = len(genomes)
     Pipe.vel = 5
     for _,g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g,config)
-        nets.append(net)
-        birds.append(Bird(230,350))
         g.fitness = 0
         ge.append(g)
-
-    log_event(f"Generation {GENERATION} started with {len(birds)} birds")
-
-    base = Base(730)
-    pipes = [Pipe(600)]
-    score = 0
-
-    win = ensure_window()
-    clock = pygame.time.Clock()
+    nets = NetworkBatch(ge, config)
+    birds = BirdPopulation(population_size, 230, 350)
+
+    if course is None:
+        course = Course(random.randrange(2 ** 32))
+    # the base only scrolls for the viewer, so headless runs never load its sprite
+    base = None if headless else Base(730)
+    world = _CourseWorld(0, course)
+
+    exchange = None if headless else FRAME_EXCHANGE
+    if not headless:
+        if exchange is None:
+            win = ensure_window()
+        clock = pygame.time.Clock()
     start_time = time.time()
 
     final_best_fitness = 0
-    run = True
-    while run:
-        clock.tick(30)
+    stop_reason = None
+    step_count = 0
+    frame_steps = 0
+    frame_start = time.perf_counter()
+    while True:
+        new_frame = not headless and frame_steps == 0
+        if new_frame:
+            # on its own thread the simulation only sleeps to hold a fixed speed
+            if exchange is None or SIM_SPEEDS[SIM_SPEED] is not None:
+                clock.tick(DISPLAY_FPS)
+            frame_start = time.perf_counter()
+        # the clock's sleep is left out of every phase
+        if profiler:
+            profiler.start_frame()
+        if new_frame and exchange is None:
+            pump_events()
+            if profiler:
+                profiler.lap("events")
         elapsed = time.time() - start_time
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.quit ()
-                quit ()
-
-        pipeInd = 0
-        if len(birds) > 0:
-            if len(pipes) > 1 and birds[0].x > pipes[0].x + pipes[0].pipeTop.get_width() :
-                pipeInd = 1
-        else:
-            run = False
+        if not birds.alive_count():
             break
 
-        for x, bird in enumerate(birds):
-            bird.move()
-            ge[x].fitness += 0.1
-
-            output = nets[birds.index(bird)].activate((bird.y, abs(bird.y - pipes[pipeInd].height), abs(bird.y - pipes[pipeInd].bot)))
+        stop_reason = _cap_reached(caps, step_count, elapsed, stop)
+        if stop_reason:
+            log_event("generation_capped", score=world.score, reason=stop_reason, alive=birds.alive_count())
+            break
+        stop_reason = world.cap_score(birds, birds.alive_indices(), caps["score"])
+        if stop_reason:
+            break
+        step_count += 1
+
+        target = world.target(birds.x)
+        birds.move()
+        birds.reward(0.1)
+        if profiler:
+            profiler.lap("physics")
+
+        alive = birds.alive_indices()
+        y = birds.y[alive]
+        output = nets.activate(alive, np.column_stack((y, np.abs(y - target.height), np.abs(y - target.bot))))
+        birds.jump(alive[output[:, 0] > 0.5])
+        if profiler:
+            profiler.lap("activation")
+
+        world.collide(birds, birds.alive_indices())
+        if profiler:
+            profiler.lap("collision")
+
+        world.advance_pipes(birds)
+        # the panel, telemetry and recordings read the current speed here
+        Pipe.vel = world.vel
+        pipes, pipeInd, score = world.pipes, world.pipe_ind, world.score
+        if profiler:
+            profiler.lap("pipes")
+
+        lost = birds.out_of_bounds()
+        for x in lost:
+            log_event("out_of_bounds", birds.identifiers[x], score, birds.live_fitness, y=birds.y[x])
+        birds.kill(lost)
+
+        if base is not None:
+            base.move()
+        # the flap frame chosen here is the one the next collision test uses,
+        # so both modes advance it whether or not anything gets drawn
+        birds.animate()
+
+        if birds.alive_count() and birds.live_fitness > final_best_fitness:
+            final_best_fitness = birds.live_fitness
+        if recorder is not None:
+            recorder.record(birds, pipes, pipeInd, score, elapsed)
+        if profiler:
+            profiler.lap("physics")
+
+        if headless:
+            if TELEMETRY is not None and TELEMETRY.due():
+                TELEMETRY.publish_frame(_frame_metrics(birds, pipes, pipeInd, score, elapsed, population_size))
+            continue
 
-            if output[0] > 0.5:
-                bird.jump()
+        # a fixed physics step per iteration, rendering only once the frame's
+        # share of steps (or, at max speed, of wall time) has been used up
+        frame_steps += 1
+        steps = SIM_SPEEDS[SIM_SPEED]
+        if steps is None:
+            if time.perf_counter() - frame_start < 1 / DISPLAY_FPS:
+                continue
+        elif frame_steps < steps:
+            continue
+        frame_steps = 0
 
-        rem = []
-        addPipe = False
-        for pipe in pipes:
-            for x, bird in enumerate(birds):
-                if pipe.collide(bird):
-                    crashed_fitness = ge[x].fitness
-                    log_event(f"Bird {bird.identifier} crashed | score {score} | fitness {crashed_fitness:.1f}")
-                    ge[x].fitness -= 1
-                    birds.pop(x)
-                    nets.pop(x)
-                    ge.pop(x)
+        metrics = _frame_metrics(birds, pipes, pipeInd, score, elapsed, population_size)
+        if TELEMETRY is not None and TELEMETRY.due():
+            TELEMETRY.publish_frame(metrics)
 
-                if not pipe.passed and pipe.x < bird.x:
-                    pipe.passed = True
-                    addPipe = True
-
-            if pipe.x + pipe.pipeTop.get_width() < 0:
-                rem.append(pipe)
+        alive = birds.alive_indices()
+        best_genome = None
+        if alive.size:
+            best_genome = ge[alive[0]]
+
+        panel_info = dict(
+            metrics,
+            sim_speed=sim_speed_label(),
+            events=list(itertools.islice(reversed(EVENT_LOG), 6))[::-1],
+            best_genome=best_genome,
+            config=config,
+            profile=profiler.summary() if profiler else None,
+        )
+        if exchange is not None:
+            exchange.publish(FrameSnapshot(birds.snapshot(), [copy.copy(pipe) for pipe in pipes],
+                                           copy.copy(base), score, panel_info))
+        if profiler:
+            profiler.lap("panel")
+        if exchange is not None:
+            continue
 
-            pipe.move()
+        drawWindow(win,birds,pipes,base,score,panel_info)
+        if profiler:
+            profiler.lap("draw")
+
+    if profiler:
+        profiler.finish()
+
+    birds.settle()
+    for g, fitness in zip(ge, birds.fitness.tolist()):
+        g.fitness = fitness
+
+    return world.score, final_best_fitness, stop_reason
+
+
+def aggregate_fitness(fitness, how):
+    """Combine a (courses, genomes) fitness array by ``"mean"``, ``"min"`` or a quantile in [0, 1]."""
+    if how == "mean":
+        return fitness.mean(axis=0)
+    if how == "min":
+        return fitness.min(axis=0)
+    return np.quantile(fitness, how, axis=0)
+
+
+def play_courses(genomes, config, courses, aggregate="mean", caps=None, window=False):
+    """Fly every genome through each of ``courses`` at once, headless, and assign the aggregate fitness.
+
+    Every course is a world of its own in one ``BirdPopulation``, with the same
+    rules as ``play``, so a genome's result on course k is exactly what ``play``
+    gives on that course. Physics, network activation and the bounds check run
+    once per step across all worlds; only the pipes are handled per world, so K
+    courses cost far less than K runs. Returns the best score of any course,
+    the peak fitness and the first cap that stopped a course (or ``None``).
+    With ``window`` an open window keeps answering (see ``refresh_window``)
+    while the courses are flown.
+    """
+    if caps is None:
+        caps = GENERATION_CAPS
+    ge = [g for _, g in genomes]
+    count = len(ge)
+    nets = NetworkBatch(ge, config)
+    birds = BirdPopulation(count, 230, 350, worlds=len(courses))
+    worlds = [_CourseWorld(index, course, tagged=True) for index, course in enumerate(courses)]
+    bounds = np.arange(len(worlds) + 1) * count
+    start_time = time.time()
 
-        if addPipe:
-            score += 1
-            for g in ge:
-                g.fitness += 5
-            Pipe.vel +=.5
-            pipes.append(Pipe(700))
-            if score > BEST_SCORE:
-                BEST_SCORE = score
-                log_event(f"New best score {BEST_SCORE} reached in generation {GENERATION}")
+    final_best_fitness = 0
+    stop_reason = None
+    step_count = 0
+    next_refresh = time.perf_counter()
+    while birds.alive_count():
+        if window and time.perf_counter() >= next_refresh:
+            refresh_window()
+            next_refresh = time.perf_counter() + 1 / DISPLAY_FPS
+        elapsed = time.time() - start_time
+        reason = _cap_reached(caps, step_count, elapsed)
+        if reason:
+            log_event("generation_capped", reason=reason, alive=birds.alive_count())
+            stop_reason = stop_reason or reason
+            break
+        if caps["score"] is not None:
+            alive = birds.alive_indices()
+            for world in worlds:
+                # a capped course is over: its birds keep their fitness and stop flying
+                reason = world.cap_score(birds, alive[birds.world[alive] == world.index], caps["score"])
+                stop_reason = stop_reason or reason
+            if not birds.alive_count():
+                break
+        step_count += 1
+
+        targets = [world.target(birds.x) for world in worlds]
+        birds.move()
+        birds.reward(0.1)
+
+        alive = birds.alive_indices()
+        world_of = birds.world[alive]
+        heights = np.array([pipe.height for pipe in targets])[world_of]
+        bots = np.array([pipe.bot for pipe in targets])[world_of]
+        y = birds.y[alive]
+        output = nets.activate(alive - world_of * count, np.column_stack((y, np.abs(y - heights), np.abs(y - bots))))
+        birds.jump(alive[output[:, 0] > 0.5])
+
+        edges = np.searchsorted(alive, bounds)
+        for world in worlds:
+            lo, hi = edges[world.index], edges[world.index + 1]
+            if lo < hi:
+                world.collide(birds, alive[lo:hi])
+                world.advance_pipes(birds)
+
+        lost = birds.out_of_bounds()
+        for x in lost:
+            world = worlds[birds.world[x]]
+            log_event("out_of_bounds", birds.identifiers[x], world.score, birds.world_fitness[world.index],
+                      y=birds.y[x], course=world.index)
+        birds.kill(lost)
+        birds.animate()
+
+        alive = birds.alive_indices()
+        if alive.size:
+            final_best_fitness = max(final_best_fitness, float(birds.world_fitness[np.unique(birds.world[alive])].max()))
+
+    birds.settle()
+    fitness = birds.fitness.reshape(len(worlds), count)
+    for g, value in zip(ge, aggregate_fitness(fitness, aggregate).tolist()):
+        g.fitness = value
+
+    return max(world.score for world in worlds), final_best_fitness, stop_reason
+
+
+def _init_worker():
+    global EVENT_SINK, TELEMETRY, FRAME_EXCHANGE
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # a forked worker inherits these but not their threads, so it keeps its records local
+    EVENT_SINK = None
+    TELEMETRY = None
+    FRAME_EXCHANGE = None
+
+
+def _play_slice(genomes, config, courses, caps, aggregate):
+    """Worker entry point: play a slice headless on the shared courses."""
+    if len(courses) == 1:
+        score, peak_fitness, stop_reason = play(genomes, config, headless=True, course=courses[0], caps=caps)
+    else:
+        score, peak_fitness, stop_reason = play_courses(genomes, config, courses, aggregate, caps)
+    return [g.fitness for _, g in genomes], score, peak_fitness, stop_reason
+
+
+class ParallelEvaluator:
+    """Evaluate each generation across worker processes.
+
+    The population is cut into slices that workers play headless, all on the
+    same ``COURSE_COUNT`` courses so their fitness values are comparable. With
+    ``replay_best`` the master flies each generation's best genome through its
+    first course in the window while the workers play the next generation; the
+    replay ends when their results are in, so the pool never waits for it.
+    """
+
+    def __init__(self, num_workers, replay_best=False):
+        self.num_workers = num_workers
+        self.replay_best = replay_best
+        self.pool = multiprocessing.Pool(num_workers, initializer=_init_worker)
+        self._replay = None
+
+    def evaluate(self, genomes, config):
+        global GENERATION, BEST_SCORE, ACTIVE_CONFIG
+        GENERATION += 1
+        EVENT_LOG.clear()
+        ACTIVE_CONFIG = config
+        log_event("generation_distributed", birds=len(genomes), workers=self.num_workers)
+
+        start_time = time.time()
+        courses = [Course(random.randrange(2 ** 32)) for _ in range(COURSE_COUNT)]
+        # a few slices per worker keeps cores busy when one slice outlives the rest
+        slice_count = max(1, min(len(genomes), self.num_workers * 4))
+        slices = [genomes[i::slice_count] for i in range(slice_count)]
+        # workers may not share this process's globals, so the settings travel with each slice
+        pending = self.pool.starmap_async(_play_slice, [(chunk, config, courses, GENERATION_CAPS, COURSE_AGGREGATE)
+                                                        for chunk in slices])
+        if self._replay is not None:
+            replay_best(*self._replay, stop=pending.ready)
+            self._replay = None
+            if PROFILER is not None:
+                PROFILER.export(GENERATION - 1)
+        if self.replay_best:
+            # the replay may end long before the workers do
+            while not pending.ready():
+                pending.wait(1 / DISPLAY_FPS)
+                refresh_window()
+        results = pending.get()
+
+        score = 0
+        peak_fitness = 0
+        stop_reasons = set()
+        for chunk, (fitnesses, slice_score, slice_peak, stop_reason) in zip(slices, results):
+            for (_, g), fitness in zip(chunk, fitnesses):
+                g.fitness = fitness
+            score = max(score, slice_score)
+            peak_fitness = max(peak_fitness, slice_peak)
+            if stop_reason:
+                stop_reasons.add(stop_reason)
+
+        for stop_reason in sorted(stop_reasons):
+            log_event("slices_capped", reason=stop_reason)
+
+        if score > BEST_SCORE:
+            BEST_SCORE = score
+            log_event("best_score", score=score)
+
+        total_elapsed = time.time() - start_time
+        log_event("generation_completed", score=score, fitness=peak_fitness, duration=total_elapsed)
+
+        if self.replay_best and genomes:
+            # NEAT may reuse the genome as an elite, so replay a copy of it as it is now
+            key, best = max(genomes, key=lambda item: item[1].fitness)
+            self._replay = ([(key, copy.deepcopy(best))], config, courses[0])
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        """Stop the workers at once, dropping any slices still queued."""
+        self.pool.terminate()
+        self.pool.join()
+
+
+class _GeneTable:
+    """One kind of gene (nodes or connections) of many genomes as dense arrays.
+
+    Each gene key gets a row and each genome a column, so the genes one genome
+    is compared on are contiguous rows. ``order[g]`` lists genome ``g``'s gene
+    rows in its own dict order, padded with the last row, which no genome has,
+    so sums over it add exact zeros.
+    """
+
+    def __init__(self, gene_dicts, fields):
+        gene_rows = {}
+        owners = [genome for genome, genes in enumerate(gene_dicts) for _ in genes]
+        rows = [gene_rows.setdefault(key, len(gene_rows)) for genes in gene_dicts for key in genes]
+        every_gene = [gene for genes in gene_dicts for gene in genes.values()]
+        height = len(gene_rows) + 1
+        self.count = np.array([len(genes) for genes in gene_dicts], dtype=np.int64)
+        self.order = np.full((len(gene_dicts), self.count.max(initial=0)), height - 1, dtype=np.int64)
+        self.order[owners, np.arange(len(owners)) - np.repeat(np.cumsum(self.count) - self.count, self.count)] = rows
+        self.present = np.zeros((height, len(gene_dicts)), dtype=bool)
+        self.present[rows, owners] = True
+        self.values = {}
+        for name, value in fields.items():
+            self.values[name] = np.zeros((height, len(gene_dicts)))
+            self.values[name][rows, owners] = [value(gene) for gene in every_gene]
+
+    def distance(self, a, b, term, disjoint_coefficient):
+        """Return the gene distance of genome ``a`` to each of genomes ``b``, summed as ``DefaultGenome.distance`` does."""
+        genes = self.order[a]
+        everyone = len(b) == self.present.shape[1]
+        homologous = self.present[genes] if everyone else self.present[genes][:, b]
+        homologous &= self.present[genes, a][:, None]
+        values = {}
+        for name, v in self.values.items():
+            values[name] = v[genes, a][:, None], (v[genes] if everyone else v[genes][:, b])
+        terms = np.where(homologous, term(values), 0.0)
+        # add the terms one gene at a time, in the first genome's order, to round exactly like neat
+        total = np.zeros(len(b))
+        for gene in terms:
+            total = total + gene
+        disjoint = self.count[a] + self.count[b] - 2 * homologous.sum(axis=0)
+        larger = np.maximum(self.count[a], self.count[b])
+        return np.where(larger > 0, (total + disjoint_coefficient * disjoint) / np.maximum(larger, 1), 0.0)
+
+
+class _GenomeDistances:
+    """Distances from one genome to all the others of a ``speciate`` call.
+
+    ``row(key)`` returns them in ``keys`` order, equal to
+    ``DefaultGenome.distance`` bit for bit. Rows are kept in ``memo`` as
+    ``{key: (other_keys, distances)}`` arrays, so genomes that survive into the
+    next generation are not compared again.
+    """
+
+    def __init__(self, genomes, genome_config, memo):
+        self.keys = list(genomes)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.key_array = np.array(self.keys, dtype=np.int64)
+        self.sorter = np.argsort(self.key_array)
+        self.memo = memo
+        self.disjoint = genome_config.compatibility_disjoint_coefficient
+        self.weight = genome_config.compatibility_weight_coefficient
+        codes = {}
+        self.nodes = _GeneTable([g.nodes for g in genomes.values()], {
+            "bias": lambda n: n.bias,
+            "response": lambda n: n.response,
+            "activation": lambda n: codes.setdefault(n.activation, len(codes)),
+            "aggregation": lambda n: codes.setdefault(n.aggregation, len(codes)),
+        })
+        self.connections = _GeneTable([g.connections for g in genomes.values()], {
+            "weight": lambda c: c.weight,
+            "enabled": lambda c: c.enabled,
+        })
+
+    def _node_term(self, v):
+        d = np.abs(v["bias"][0] - v["bias"][1]) + np.abs(v["response"][0] - v["response"][1])
+        d = d + (v["activation"][0] != v["activation"][1]) + (v["aggregation"][0] != v["aggregation"][1])
+        return d * self.weight
+
+    def _connection_term(self, v):
+        d = np.abs(v["weight"][0] - v["weight"][1]) + (v["enabled"][0] != v["enabled"][1])
+        return d * self.weight
+
+    def row(self, key):
+        distance = np.empty(len(self.keys))
+        missing = np.ones(len(self.keys), dtype=bool)
+        if key in self.memo:
+            others, known = self.memo[key]
+            where = self.sorter[np.searchsorted(self.key_array, others, sorter=self.sorter)]
+            distance[where] = known
+            missing[where] = False
+        a, b = self.index[key], np.flatnonzero(missing)
+        if len(b):
+            distance[b] = (self.nodes.distance(a, b, self._node_term, self.disjoint)
+                           + self.connections.distance(a, b, self._connection_term, self.disjoint))
+        self.memo[key] = self.key_array, distance.copy()
+        return distance
+
+
+class CachedSpeciesSet(neat.DefaultSpeciesSet):
+    """``DefaultSpeciesSet`` that finds genome distances with NumPy and remembers them.
+
+    Species are assigned exactly as the default does: genomes and species are
+    visited in the same order and every distance is the same float, including
+    neat's rule that the first direction asked for a pair answers both.
+    Distances are memoised by genome key across generations and dropped once a
+    genome has left the population. It reads the ``[DefaultSpeciesSet]``
+    section, so it is selected by swapping ``config.species_set_type``.
+    """
+
+    def __init__(self, config, reporters):
+        super().__init__(config, reporters)
+        self.memo = {}
+
+    def speciate(self, config, population, generation):
+        assert isinstance(population, dict)
+
+        compatibility_threshold = self.species_set_config.compatibility_threshold
+
+        genomes = dict(population)
+        for s in self.species.values():
+            genomes.setdefault(s.representative.key, s.representative)
+        alive = np.array(list(genomes), dtype=np.int64)
+        for key, (others, known) in list(self.memo.items()):
+            if key in genomes:
+                keep = np.isin(others, alive)
+                self.memo[key] = others[keep], known[keep]
             else:
-                log_event(f"Score increased to {score}; pipe speed {Pipe.vel:.1f}")
-
-        for r in rem:
-            pipes.remove(r)
-
-        if not pipes:
-            pipes.append(Pipe(700))
-
-        pipeInd = max(0, min(pipeInd, len(pipes) - 1))
-
-        for x, bird in enumerate(birds):
-            if bird.y + bird.img.get_height() >= 730 or bird.y < 0:
-                log_event(f"Bird {bird.identifier} out of bounds at y={bird.y:.0f}")
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
-
-        base.move()
-        fitness_values = [g.fitness for g in ge]
-        best_fitness = max(fitness_values) if fitness_values else 0
-        avg_fitness = sum(fitness_values) / len(fitness_values) if fitness_values else 0
-        if best_fitness > final_best_fitness:
-            final_best_fitness = best_fitness
-
-        target_pipe_info = {"x": 0.0, "gap_start": 0.0, "gap_centre": 0.0, "gap_end": 0.0}
-        top_birds = []
-        if pipes:
-            target_pipe = pipes[pipeInd]
-            gap_start = target_pipe.height
-            gap_end = target_pipe.bot
-            gap_centre = (gap_start + gap_end) / 2
-            target_pipe_info = {
-                "x": target_pipe.x,
-                "gap_start": gap_start,
-                "gap_centre": gap_centre,
-                "gap_end": gap_end,
-            }
-
-            if birds:
-                for bird, genome in zip(birds, ge):
-                    top_birds.append({
-                        "id": bird.identifier,
-                        "fitness": genome.fitness,
-                        "y": bird.y,
-                        "dx": target_pipe.x - bird.x,
-                        "dy": gap_centre - bird.y,
-                        "action": bird.last_action,
-                    })
-                top_birds.sort(key=lambda item: item["fitness"], reverse=True)
-                top_birds = top_birds[:3]
-
-        score_rate = (score / (elapsed / 60)) if elapsed > 0 else 0
-
-        best_genome = None
-        if ge:
-            best_index = max(range(len(ge)), key=lambda idx: ge[idx].fitness)
-            best_genome = ge[best_index]
-
-        panel_info = {
-            "generation": GENERATION,
-            "population": population_size,
-            "alive": len(birds),
-            "score": score,
+                del self.memo[key]
+        distances = _GenomeDistances(genomes, config.genome_config, self.memo)
+        index = distances.index
+        # what each old representative was told for every genome (NaN if not asked),
+        # and every distance in the order GenomeDistanceCache would have stored it
+        asked = {}
+        report = []
+
+        def representative_row(key):
+            """Distances from ``key``, where pairs asked the other way round keep their answer."""
+            row = distances.row(key)
+            fresh = np.isnan(asked[key]) if key in asked else np.ones(len(row), dtype=bool)
+            for other, told in asked.items():
+                if not np.isnan(told[index[key]]):
+                    row[index[other]] = told[index[key]]
+                    fresh[index[other]] = False
+            return row, fresh
+
+        # Find the best representatives for each existing species. The set is
+        # grown key by key like the default's (set(dict) sizes its table up
+        # front), so genomes are visited and popped in the same order.
+        unspeciated = set(population.keys())
+        new_representatives = {}
+        new_members = {}
+        for sid, s in self.species.items():
+            rid = s.representative.key
+            candidates = list(unspeciated)
+            cols = np.array([index[gid] for gid in candidates], dtype=np.int64)
+            row, fresh = representative_row(rid)
+            d = row[cols]
+            told = np.full(len(row), np.nan)
+            told[cols] = d
+            asked[rid] = told
+            report += np.repeat(d[fresh[cols]], np.where(cols == index[rid], 1, 2)[fresh[cols]]).tolist()
+
+            # the new representative is the genome closest to the current one
+            new_rid = candidates[int(np.argmin(d))]
+            new_representatives[sid] = new_rid
+            new_members[sid] = [new_rid]
+            unspeciated.remove(new_rid)
+
+        # Partition population into species based on genetic similarity.
+        rows = {}
+        for sid, rid in new_representatives.items():
+            row, fresh = representative_row(rid)
+            rows[sid] = row.tolist(), fresh.tolist()
+        while unspeciated:
+            gid = unspeciated.pop()
+            col = index[gid]
+
+            # Find the species with the most similar representative.
+            candidates = []
+            for sid, (row, fresh) in rows.items():
+                d = row[col]
+                if fresh[col]:
+                    report += (d, d)
+                if d < compatibility_threshold:
+                    candidates.append((d, sid))
+
+            if candidates:
+                ignored_sdist, sid = min(candidates, key=lambda x: x[0])
+                new_members[sid].append(gid)
+            else:
+                # No species is similar enough, create a new species, using
+                # this genome as its representative.
+                sid = next(self.indexer)
+                new_representatives[sid] = gid
+                new_members[sid] = [gid]
+                row, fresh = representative_row(gid)
+                rows[sid] = row.tolist(), fresh.tolist()
+
+        # Update species collection based on new speciation.
+        self.genome_to_species = {}
+        for sid, rid in new_representatives.items():
+            s = self.species.get(sid)
+            if s is None:
+                s = neat.species.Species(sid, generation)
+                self.species[sid] = s
+
+            members = new_members[sid]
+            for gid in members:
+                self.genome_to_species[gid] = sid
+
+            s.update(population[rid], {gid: population[gid] for gid in members})
+
+        gdmean = neat.math_util.mean(report)
+        gdstdev = neat.math_util.stdev(report)
+        self.reporters.info(
+            'Mean genetic distance {0:.3f}, standard deviation {1:.3f}'.format(gdmean, gdstdev))
+
+
+# species sets selectable from run(); both read the [DefaultSpeciesSet] config section
+SPECIES_SETS = {"default": neat.DefaultSpeciesSet, "cached": CachedSpeciesSet}
+
+
+def _write_gzip(path, payload):
+    """Compress ``payload`` into ``path``, replacing it only once the file is complete."""
+    partial = path + ".partial"
+    with gzip.open(partial, "wb", compresslevel=5) as handle:
+        handle.write(payload)
+    os.replace(partial, path)
+
+
+def _read_gzip(path):
+    with gzip.open(path, "rb") as handle:
+        return pickle.load(handle)
+
+
+class CheckpointReporter(neat.reporting.BaseReporter):
+    """Save the population every ``interval`` generations without stalling the next one.
+
+    The state is pickled between generations, so it is consistent, while the
+    slower compression and disk write happen on a background thread during the
+    following generation. The thread is not a daemon: closing the window still
+    lets a pending checkpoint finish. Checkpoints also hold the run's
+    ``GENERATION`` and ``BEST_SCORE``, the RNG state and the best genome so far,
+    and are restored with ``restore_checkpoint``.
+    """
+
+    def __init__(self, directory, interval=5):
+        self.directory = directory
+        self.interval = interval
+        self.generation = None
+        self.best_genome = None
+        self._writer = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+            self.best_genome = copy.deepcopy(best_genome)
+
+    def end_generation(self, config, population, species_set):
+        if (self.generation + 1) % self.interval == 0:
+            self.save(config, population, species_set)
+
+    def save(self, config, population, species_set):
+        # store the species as neat's own class and leave out its reporters, which
+        # include this one and the statistics of every past generation, so the file
+        # loads outside this script; restore_checkpoint attaches both again
+        species_set = _convert_species_set(species_set, neat.DefaultSpeciesSet, None)
+        config = copy.copy(config)
+        config.species_set_type = neat.DefaultSpeciesSet
+        state = {
+            # the population here is the next one NEAT will evaluate
+            "generation": self.generation + 1,
+            "config": config,
+            "population": population,
+            "species_set": species_set,
+            "random_state": random.getstate(),
+            "run_generation": GENERATION,
             "best_score": BEST_SCORE,
-            "best_fitness": best_fitness,
-            "avg_fitness": avg_fitness,
-            "score_rate": score_rate,
-            "pipe_speed": Pipe.vel,
-            "elapsed": elapsed,
-            "target_pipe": target_pipe_info,
-            "top_birds": top_birds,
-            "events": EVENT_LOG.copy(),
-            "best_genome": best_genome,
-            "config": ACTIVE_CONFIG,
+            "best_genome": self.best_genome,
         }
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        path = os.path.join(self.directory, f"checkpoint-{GENERATION:04d}.pkl.gz")
+        self.wait()
+        self._writer = threading.Thread(target=_write_gzip, args=(path, payload), name="checkpoint-writer")
+        self._writer.start()
+        log_event("checkpoint", path=path)
+
+    def wait(self):
+        """Block until the last checkpoint is on disk."""
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+
+
+def _convert_species_set(species_set, species_type, reporters):
+    """Return a ``species_type`` that carries on from ``species_set``'s species."""
+    converted = species_type(species_set.species_set_config, reporters)
+    converted.indexer = species_set.indexer
+    converted.species = species_set.species
+    converted.genome_to_species = species_set.genome_to_species
+    return converted
+
+
+def restore_checkpoint(path, speciation="default"):
+    """Return the ``neat.Population`` saved in a checkpoint and restore the run's globals.
+
+    The species carry on in the ``SPECIES_SETS`` class named by ``speciation``.
+    """
+    global GENERATION, BEST_SCORE
+    state = _read_gzip(path)
+    random.setstate(state["random_state"])
+    GENERATION = state["run_generation"]
+    BEST_SCORE = state["best_score"]
+
+    config = state["config"]
+    config.species_set_type = SPECIES_SETS[speciation]
+    p = neat.Population(config, (state["population"], state["species_set"], state["generation"]))
+    p.species = _convert_species_set(p.species, config.species_set_type, p.reporters)
+    # and a fresh reproduction would hand out genome keys the population already uses
+    p.reproduction.genome_indexer = itertools.count(max(state["population"]) + 1)
+    p.best_genome = state["best_genome"]
+    return p
+
+
+def save_genome(genome, path):
+    _write_gzip(path, pickle.dumps(genome, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def load_genome(path):
+    """Load a genome saved by ``save_genome``, or the best genome of a checkpoint."""
+    saved = _read_gzip(path)
+    if isinstance(saved, dict):
+        return saved["best_genome"]
+    return saved
+
+
+def replay(configpath, genome_path, speed=1):
+    """Fly a saved genome through fresh courses in the window until it is closed."""
+    global GENERATION, SIM_SPEED, ACTIVE_CONFIG
+    SIM_SPEED = SIM_SPEEDS.index(speed)
+    config = neat.config.Config(neat.DefaultGenome,neat.DefaultReproduction,neat.DefaultSpeciesSet,neat.DefaultStagnation,configpath)
+    ACTIVE_CONFIG = config
+    genome = load_genome(genome_path)
+    while True:
+        GENERATION += 1
+        EVENT_LOG.clear()
+        log_event("replay", genome=genome.key)
+        score, _, _ = play([(genome.key, genome)], config)
+        print(f"Replay {GENERATION}: score {score}, fitness {genome.fitness:.1f}")
+
+
+def view_recording(path, configpath, speed=1):
+    """Play back a recorded generation in the window without evaluating any network.
+
+    Space pauses (and restarts once the end is reached), the left and right
+    arrows step one physics step, Page Up and Page Down jump a second, Home and
+    End go to either end, and the speed keys fast-forward as in training. The
+    steps are memory-mapped, so playback starts at once however long the file.
+    """
+    global GENERATION, BEST_SCORE, SIM_SPEED, ACTIVE_CONFIG
+    SIM_SPEED = SIM_SPEEDS.index(speed)
+    header, steps = open_recording(path)
+    if not len(steps):
+        raise ValueError(f"{path} holds no recorded steps")
+    genomes = config = None
+    if os.path.exists(recording_genomes_path(path)):
+        genomes = _read_gzip(recording_genomes_path(path))
+        config = neat.config.Config(neat.DefaultGenome,neat.DefaultReproduction,neat.DefaultSpeciesSet,neat.DefaultStagnation,configpath)
+        ACTIVE_CONFIG = config
+    GENERATION = header["generation"]
+    EVENT_LOG.clear()
 
+    birds = BirdPopulation(header["birds"], header["x"])
+    birds.identifiers = np.arange(header["first_bird"], header["first_bird"] + header["birds"])
+    base = Base(730)
+    win = ensure_window()
+    clock = pygame.time.Clock()
+    last = len(steps) - 1
+    position = 0
+    paused = False
+    while True:
+        clock.tick(DISPLAY_FPS)
+        for key in pump_events():
+            if key == pygame.K_SPACE:
+                if paused and position == last:
+                    position = 0
+                paused = not paused
+            elif key in (pygame.K_LEFT, pygame.K_RIGHT):
+                paused = True
+                position += 1 if key == pygame.K_RIGHT else -1
+            elif key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                position += DISPLAY_FPS if key == pygame.K_PAGEDOWN else -DISPLAY_FPS
+            elif key == pygame.K_HOME:
+                position = 0
+            elif key == pygame.K_END:
+                position = last
+        position = max(0, min(position, last))
+        if position == last:
+            paused = True
+
+        step = steps[position]
+        birds.y[:] = step["y"]
+        birds.tilt[:] = step["tilt"]
+        birds.frame[:] = step["frame"]
+        birds.action[:] = step["action"]
+        birds.alive[:] = step["alive"]
+        birds._alive_idx = None
+        birds.world_fitness[0] = step["fitness"]
+        count = int(step["pipe_count"])
+        pipes = [Pipe(x, height) for x, height in zip(step["pipe_x"][:count].tolist(), step["pipe_height"][:count].tolist())]
+        # both base tiles scroll Base.vel per step and jump two widths ahead once off screen
+        moved = Base.vel * (position + 1)
+        base.x1 = (base.width - moved) % (2 * base.width) - base.width
+        base.x2 = (2 * base.width - moved) % (2 * base.width) - base.width
+        Pipe.vel = float(step["pipe_speed"])
+        BEST_SCORE = int(step["best_score"])
+
+        score = int(step["score"])
+        metrics = _frame_metrics(birds, pipes, int(step["pipe_index"]), score, float(step["elapsed"]), len(birds))
+        alive = birds.alive_indices()
+        state = " (paused)" if paused else ""
+        position_event = Event("recording", GENERATION, None, None, None, time.time(),
+                               {"step": position + 1, "steps": last + 1, "state": state})
+        panel_info = dict(
+            metrics,
+            sim_speed=sim_speed_label(),
+            events=[position_event],
+            best_genome=genomes[alive[0]] if genomes and alive.size else None,
+            config=config,
+            profile=None,
+        )
         drawWindow(win,birds,pipes,base,score,panel_info)
+        if not paused:
+            position += SIM_SPEEDS[SIM_SPEED] or VIEWER_MAX_STEPS
+
+
+def _evolve(population, fitness):
+    """Run NEAT until it finds a winner, on a simulation thread while ``FRAME_EXCHANGE`` is set."""
+    if FRAME_EXCHANGE is None:
+        return population.run(fitness, None)
+    # build the window and the sprites the simulation uses here, so only this thread fills ASSETS
+    ensure_window()
+    for name in ("birdIMGs", "birdMasks", "pipeIMG", "pipeTopIMG", "pipeTopMask", "pipeBotMask", "baseIMG"):
+        ASSETS[name]
+    outcome = {}
+
+    def simulate():
+        try:
+            outcome["winner"] = population.run(fitness, None)
+        except BaseException as error:
+            outcome["error"] = error
+
+    # a daemon, so closing the window ends the run mid-generation
+    simulation = threading.Thread(target=simulate, name="simulation", daemon=True)
+    simulation.start()
+    render_frames(FRAME_EXCHANGE, simulation)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["winner"]
+
+
+def run(configpath, headless=False, seed=None, workers=1, speed=1, profile=None, profile_format="csv",
+        checkpoint_dir=None, checkpoint_every=5, resume=None, max_frames=None, max_score=None, max_seconds=None,
+        event_log=None, courses=1, aggregate="mean", speciation="default", telemetry_port=None,
+        telemetry_host="127.0.0.1", telemetry_interval=0.25, record_dir=None, render_thread=False,
+        replay_frames=REPLAY_CAPS["frames"]):
+    """Evolve a population with the given NEAT config.
+
+    ``headless`` skips the window, the panel and the 30 FPS clock so physics runs
+    as fast as the CPU allows; it works with the SDL dummy video driver. Passing
+    ``seed`` makes the pipe courses and evolution reproducible, and a headless run
+    produces the same fitness values as a visual run with the same seed. Each
+    generation flies one ``Course`` whose seed is drawn from the seeded RNG.
+    ``workers`` above one spreads each generation over that many processes; the
+    window then replays the best genome of every generation unless headless.
+    ``speed`` is the starting number of physics steps per rendered frame (one of
+    ``SIM_SPEEDS``); it can be changed from the keyboard while the window runs.
+    ``profile`` names a directory that receives per-step phase timings of every
+    generation as ``profile_format`` (``csv`` or ``jsonl``) files; the panel
+    then shows their rolling averages. With ``checkpoint_dir`` the population is
+    saved there every ``checkpoint_every`` generations and the winner is saved
+    as ``winner.pkl.gz``; ``resume`` continues from a checkpoint file.
+    ``max_frames``, ``max_score`` and ``max_seconds`` end a generation early once
+    it reaches that many physics steps, that score or that much wall time (see
+    ``GENERATION_CAPS``); the time cap depends on machine speed, so it is not
+    reproducible with ``seed``. ``event_log`` names a JSONL file that receives
+    every event of the run (from this process; workers' bird events stay local).
+    ``courses`` above one scores every genome on that many courses per
+    generation in one batched headless pass, combined by ``aggregate``
+    (``"mean"``, ``"min"`` or a quantile between 0 and 1); a visual run then
+    replays each generation's best genome on the first course. Such replays stop
+    after ``replay_frames`` physics steps (None lets them run to the end).
+    ``speciation`` picks the species set from ``SPECIES_SETS``; ``"cached"``
+    assigns the same species as ``"default"`` in a fraction of the time on large
+    populations, and also applies to a resumed run.
+    ``telemetry_port`` starts a ``TelemetryServer`` on ``telemetry_host`` that
+    publishes frame snapshots (at most one per ``telemetry_interval`` seconds)
+    and per-generation summaries; snapshots come from runs that fly one course
+    in this process, including the window's replays.
+    ``record_dir`` receives a ``TrajectoryRecorder`` file of every generation
+    that flies one course in this process, for ``view_recording`` to play back.
+    ``render_thread`` moves evolution to a simulation thread that hands frames
+    to the window through a ``FrameExchange``, so drawing never slows a
+    generation down and the window answers while a step is slow.
+    """
+    global HEADLESS, SIM_SPEED, PROFILER, EVENT_SINK, TELEMETRY, COURSE_COUNT, COURSE_AGGREGATE, RECORD_DIR
+    global FRAME_EXCHANGE
+    if courses < 1:
+        raise ValueError(f"courses must be at least 1, got {courses}")
+    if checkpoint_every < 1:
+        raise ValueError(f"checkpoint_every must be at least 1, got {checkpoint_every}")
+    RECORD_DIR = record_dir
+    FRAME_EXCHANGE = FrameExchange() if render_thread and not headless else None
+    COURSE_COUNT = courses
+    COURSE_AGGREGATE = aggregate
+    # an earlier run() in this process may have left its sink open
+    if EVENT_SINK is not None:
+        EVENT_SINK.close()
+    EVENT_SINK = EventSink(event_log) if event_log else None
+    # likewise its server, which would otherwise still hold the port
+    if TELEMETRY is not None:
+        TELEMETRY.close()
+    TELEMETRY = None
+    if telemetry_port is not None:
+        TELEMETRY = TelemetryServer(telemetry_host, telemetry_port, telemetry_interval)
+        print("Telemetry at http://{}:{}/stream".format(*TELEMETRY.address))
+    GENERATION_CAPS.update(frames=max_frames, score=max_score, seconds=max_seconds)
+    REPLAY_CAPS["frames"] = replay_frames
+    HEADLESS = headless
+    SIM_SPEED = SIM_SPEEDS.index(speed)
+    PROFILER = FrameProfiler(profile, profile_format) if profile else None
+    if headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if seed is not None:
+        random.seed(seed)
 
-    total_elapsed = time.time() - start_time
-    log_event(
-        f"Generation {GENERATION} completed | last score {score} | peak fitness {final_best_fitness:.1f} | duration {total_elapsed:.1f}s"
-    )
-
-
-def run(configpath):
     config = neat.config.Config(neat.DefaultGenome,neat.DefaultReproduction,neat.DefaultSpeciesSet,neat.DefaultStagnation,configpath)
+    config.species_set_type = SPECIES_SETS[speciation]
 
-    p = neat.Population(config)
+    if resume:
+        p = restore_checkpoint(resume, speciation)
+    else:
+        p = neat.Population(config)
 
     p.add_reporter(neat.StdOutReporter(True))
     stats = neat.StatisticsReporter()
     p.add_reporter(stats)
+    if TELEMETRY is not None:
+        p.add_reporter(TELEMETRY)
+    checkpointer = None
+    if checkpoint_dir:
+        checkpointer = CheckpointReporter(checkpoint_dir, checkpoint_every)
+        # a resumed run keeps the best genome from before the checkpoint
+        checkpointer.best_genome = p.best_genome
+        p.add_reporter(checkpointer)
 
-    winner = p.run(main,None)
+    if workers > 1:
+        evaluator = ParallelEvaluator(workers, replay_best=not headless)
+        try:
+            winner = _evolve(p, evaluator.evaluate)
+        except BaseException:
+            # a closed window, Ctrl-C or an error should not wait out the generation's slices
+            evaluator.terminate()
+            raise
+        evaluator.close()
+    else:
+        winner = _evolve(p, main)
 
+    if checkpointer is not None:
+        checkpointer.wait()
+        save_genome(winner, os.path.join(checkpoint_dir, "winner.pkl.gz"))
     return winner
 
 
+def _aggregate_arg(value):
+    if value in ("mean", "min"):
+        return value
+    try:
+        quantile = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'mean', 'min' or a quantile, got {value!r}")
+    if not 0 <= quantile <= 1:
+        raise argparse.ArgumentTypeError(f"quantile {quantile} is outside [0, 1]")
+    return quantile
+
+
+def _positive_int_arg(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{number} is less than 1")
+    return number
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train Flappy Bird agents with NEAT.")
+    parser.add_argument("--headless", action="store_true", help="run without a window at uncapped speed")
+    parser.add_argument("--seed", type=int, default=None, help="seed for a reproducible run")
+    parser.add_argument("--workers", type=int, default=1, help="evaluate generations across this many processes")
+    parser.add_argument("--speed", choices=["max" if steps is None else f"{steps}x" for steps in SIM_SPEEDS],
+                        default="1x", help="physics steps per rendered frame")
+    parser.add_argument("--profile", metavar="DIR", default=None, help="write per-step phase timings to this directory")
+    parser.add_argument("--profile-format", choices=["csv", "jsonl"], default="csv", help="file format for --profile")
+    parser.add_argument("--checkpoint-dir", metavar="DIR", default=None, help="save checkpoints and the winner here")
+    parser.add_argument("--checkpoint-every", type=_positive_int_arg, default=5, help="generations between checkpoints")
+    parser.add_argument("--resume", metavar="CHECKPOINT", default=None, help="continue training from a checkpoint")
+    parser.add_argument("--max-frames", type=int, default=None, help="end a generation after this many physics steps")
+    parser.add_argument("--max-score", type=int, default=None, help="end a generation once this score is reached")
+    parser.add_argument("--max-seconds", type=float, default=None, help="end a generation after this much wall time")
+    parser.add_argument("--replay-frames", type=int, default=REPLAY_CAPS["frames"],
+                        help="end the window's replay of a generation's best genome after this many physics steps")
+    parser.add_argument("--courses", type=_positive_int_arg, default=1, help="courses every genome flies per generation")
+    parser.add_argument("--aggregate", type=_aggregate_arg, default="mean",
+                        help="combine course fitness by 'mean', 'min' or a quantile such as 0.25")
+    parser.add_argument("--speciation", choices=sorted(SPECIES_SETS), default="default",
+                        help="species set; 'cached' gives the same species faster on large populations")
+    parser.add_argument("--telemetry", metavar="PORT", type=int, default=None,
+                        help="serve live metrics over HTTP on this port (0 picks a free one)")
+    parser.add_argument("--telemetry-host", default="127.0.0.1", help="address the telemetry server binds to")
+    parser.add_argument("--telemetry-interval", type=float, default=0.25,
+                        help="seconds between published frame snapshots")
+    parser.add_argument("--event-log", metavar="PATH", default=None, help="append every event to this JSONL file")
+    parser.add_argument("--render-thread", action="store_true",
+                        help="simulate on a separate thread so drawing never holds evolution back")
+    parser.add_argument("--record", metavar="DIR", default=None,
+                        help="write every generation's bird and pipe states to this directory")
+    parser.add_argument("--view-recording", metavar="FILE", default=None,
+                        help="play back a recorded generation without training")
+    parser.add_argument("--replay", metavar="GENOME", default=None,
+                        help="fly a saved winner (or a checkpoint's best genome) without training")
+    args = parser.parse_args()
+
     localDir = os.path.dirname(__file__)
     configPath = os.path.join(localDir,"Config.txt")
-    run(configPath)
+    speed = None if args.speed == "max" else int(args.speed[:-1])
+    if args.replay:
+        replay(configPath, args.replay, speed=speed)
+    elif args.view_recording:
+        view_recording(args.view_recording, configPath, speed=speed)
+    else:
+        run(configPath, headless=args.headless, seed=args.seed, workers=args.workers, speed=speed,
+            profile=args.profile, profile_format=args.profile_format,
+            checkpoint_dir=args.checkpoint_dir, checkpoint_every=args.checkpoint_every, resume=args.resume,
+            max_frames=args.max_frames, max_score=args.max_score, max_seconds=args.max_seconds,
+            event_log=args.event_log, courses=args.courses, aggregate=args.aggregate,
+            speciation=args.speciation, telemetry_port=args.telemetry, telemetry_host=args.telemetry_host,
+            telemetry_interval=args.telemetry_interval, record_dir=args.record,
+            render_thread=args.render_thread, replay_frames=args.replay_frames)
 
 
 
@@ -0,0 +1,619 @@
+"""Benchmark suite for the hot paths of the Flappy Bird training loop.
+
+Run ``python benchmark.py`` to time the real code paths in ``Flappy.py`` at
+several population sizes; ``--json results.json`` also writes every
+measurement as a flat record so runs from two commits can be diffed.
+``--legacy`` adds before/after comparisons against the implementations the
+caches replaced. The SDL dummy video driver is selected automatically, so no
+display is required.
+"""
+import argparse
+import importlib.metadata
+import itertools
+import json
+import os
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import neat
+import numpy as np
+import pygame
+
+import Flappy
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Config.txt")
+
+
+def _per_call(func, repeat, rounds=3):
+    """Return the best mean wall time of ``func()`` over ``rounds`` runs of ``repeat`` calls, in seconds."""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        mean = (time.perf_counter() - start) / repeat
+        best = mean if best is None else min(best, mean)
+    return best
+
+
+class Results:
+    """Collects measurements, prints them and exports them as JSON records."""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, name, variant, seconds, unit, pop_size=None):
+        scale = 1e6 if unit.startswith("us") else 1e3
+        record = {
+            "name": name,
+            "variant": variant,
+            "pop_size": pop_size,
+            "unit": unit,
+            "value": round(seconds * scale, 4),
+        }
+        self.records.append(record)
+        size = "" if pop_size is None else f"n={pop_size}"
+        print(f"  {variant:<36} {size:>8} {record['value']:>12.4f} {unit}")
+
+    def to_json(self, path):
+        meta = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        }
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"meta": meta, "results": self.records}, handle, indent=2)
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def load_config(pop_size=None):
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                                neat.DefaultStagnation, CONFIG_PATH)
+    if pop_size is not None:
+        config.pop_size = pop_size
+    return config
+
+
+def sample_genomes(config, count, seed=0):
+    """Return ``count`` fresh genomes, created from a seeded RNG."""
+    random.seed(seed)
+    genomes = []
+    for key in range(1, count + 1):
+        genome = config.genome_type(key)
+        genome.configure_new(config.genome_config)
+        genomes.append(genome)
+    return genomes
+
+
+def evolved_genome(config, mutations=40, seed=0):
+    """Return a genome grown by repeated mutation, with hidden nodes like a late generation."""
+    genome = sample_genomes(config, 1, seed)[0]
+    for _ in range(mutations):
+        genome.mutate(config.genome_config)
+    return genome
+
+
+def spread_population(size, seed):
+    """Return a BirdPopulation with birds spread over the screen and random frames/tilts."""
+    rng = random.Random(seed)
+    tilts = Flappy.Bird.reachableTilts()
+    birds = Flappy.BirdPopulation(size)
+    birds.y[:] = [rng.uniform(0, 680) for _ in range(size)]
+    birds.tilt[:] = [rng.choice(tilts) for _ in range(size)]
+    birds.frame[:] = [rng.randrange(len(Flappy.ASSETS["birdIMGs"])) for _ in range(size)]
+    return birds
+
+
+def sample_panel_info(config):
+    """Return a ``panel_info`` dict shaped like the one ``play`` builds mid-generation."""
+    return {
+        "generation": 12,
+        "population": config.pop_size,
+        "alive": 17,
+        "score": 8,
+        "best_score": 31,
+        "best_fitness": 123.4,
+        "avg_fitness": 98.7,
+        "score_rate": 12.3,
+        "pipe_speed": 9.0,
+        "elapsed": 45.6,
+        "sim_speed": "1x",
+        "target_pipe": {"x": 300.0, "gap_start": 200, "gap_centre": 300.0, "gap_end": 400},
+        "top_birds": [
+            {"id": i, "fitness": 120.0 - i, "y": 310.0 + i, "dx": 70, "dy": -10.0, "action": "Dive"}
+            for i in range(3)
+        ],
+        "events": [Flappy.Event("crash", 12, i, 8, 80.1, 0.0, {}) for i in range(4, 10)],
+        "best_genome": evolved_genome(config),
+        "config": config,
+    }
+
+
+def bench_bird_move(results, sizes, frames):
+    print("Bird.move")
+    bird = Flappy.Bird(230, 350)
+
+    def step():
+        bird.move()
+        if bird.y > 600:
+            bird.jump()
+
+    results.add("bird_move", "Bird.move", _per_call(step, frames * 100), "us/call")
+    for size in sizes:
+        birds = Flappy.BirdPopulation(size)
+
+        def step_all():
+            birds.move()
+            birds.jump(np.flatnonzero(birds.y > 600))
+
+        results.add("bird_move", "BirdPopulation.move", _per_call(step_all, frames), "ms/frame", size)
+
+
+def bench_pipe_collide(results, sizes, frames):
+    print("Pipe.collide")
+    pipe = Flappy.Pipe(210, 300)
+    bird = Flappy.Bird(230, 280)
+    results.add("pipe_collide", "Pipe.collide", _per_call(lambda: pipe.collide(bird), frames * 100), "us/call")
+    for size in sizes:
+        birds = spread_population(size, size)
+        # one pipe level with the birds, one still approaching
+        pipes = [Flappy.Pipe(210, 300), Flappy.Pipe(510, 250)]
+
+        def collide_all():
+            for pipe in pipes:
+                birds.collide(pipe)
+
+        results.add("pipe_collide", "BirdPopulation.collide", _per_call(collide_all, frames), "ms/frame", size)
+
+
+def check_collision(sizes, trials=20, seed=0):
+    """Compare ``BirdPopulation.collide`` with ``Pipe.collide`` on every bird, one at a time.
+
+    Pipes are placed across the birds' column so most trials have both hits
+    and misses. Returns whether every trial found the same birds.
+    """
+    print("collision equivalence")
+    rng = random.Random(seed)
+    agreed = True
+    for size in sizes:
+        mismatches = hits = 0
+        for trial in range(trials):
+            birds = spread_population(size, rng.randrange(2 ** 32))
+            pipe = Flappy.Pipe(rng.uniform(130, 330), rng.randrange(50, 450))
+            batched = set(birds.collide(pipe).tolist())
+            single = set()
+            for i in birds.alive_indices().tolist():
+                bird = Flappy.Bird(birds.x, birds.y[i])
+                bird.img = bird.IMGs[birds.frame[i]]
+                if pipe.collide(bird):
+                    single.add(i)
+            mismatches += len(batched ^ single)
+            hits += len(single)
+        agreed &= mismatches == 0
+        print(f"  n={size:<6} {trials} pipes  {hits} hits  {mismatches} mismatches")
+    return agreed
+
+
+def bench_activation(results, sizes, frames):
+    print("network activation")
+    config = load_config()
+    genome = evolved_genome(config)
+    net = neat.nn.FeedForwardNetwork.create(genome, config)
+    results.add("activation", "FeedForwardNetwork.activate",
+                _per_call(lambda: net.activate((350.0, 50.0, 150.0)), frames * 100), "us/call")
+    for size in sizes:
+        genomes = sample_genomes(config, size)
+        for genome in genomes[::3]:
+            genome.mutate(config.genome_config)
+        compile_time = _per_call(lambda: Flappy.NetworkBatch(genomes, config), 1, rounds=1)
+        results.add("activation", "NetworkBatch compile", compile_time, "ms/generation", size)
+
+        batch = Flappy.NetworkBatch(genomes, config)
+        rows = np.arange(size)
+        y = np.random.default_rng(size).uniform(0, 680, size)
+        inputs = np.column_stack((y, np.abs(y - 300), np.abs(y - 500)))
+        results.add("activation", "NetworkBatch.activate",
+                    _per_call(lambda: batch.activate(rows, inputs), frames), "ms/frame", size)
+
+
+def check_activation(sizes, frames=10, seed=0, tolerance=1e-9):
+    """Compare ``NetworkBatch`` with neat's ``FeedForwardNetwork`` on mutated genomes.
+
+    Every genome is mutated a random number of times, activation functions
+    included, and each frame feeds a random subset of them game-like inputs.
+    Returns whether every output is within ``tolerance`` and none lands on the
+    other side of the 0.5 jump threshold.
+    """
+    print("activation equivalence")
+    config = load_config()
+    # exercise every activation in the config, not only the default
+    config.genome_config.activation_mutate_rate = 0.5
+    rng = np.random.default_rng(seed)
+    agreed = True
+    for size in sizes:
+        genomes = sample_genomes(config, size, seed)
+        for genome in genomes:
+            for _ in range(rng.integers(0, 20)):
+                genome.mutate(config.genome_config)
+        batch = Flappy.NetworkBatch(genomes, config)
+        nets = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in genomes]
+        worst = 0.0
+        flips = 0
+        for _ in range(frames):
+            rows = np.flatnonzero(rng.random(size) < 0.7)
+            y = rng.uniform(0, 680, size)
+            inputs = np.column_stack((y, np.abs(y - rng.uniform(50, 450)), np.abs(y - rng.uniform(250, 650))))
+            outputs = batch.activate(rows, inputs[rows])
+            for row, i in enumerate(rows.tolist()):
+                expected = nets[i].activate(tuple(inputs[i]))
+                worst = max(worst, max(abs(a - b) for a, b in zip(expected, outputs[row])))
+                flips += (expected[0] > 0.5) != (outputs[row, 0] > 0.5)
+        same = worst <= tolerance and flips == 0
+        agreed &= same
+        print(f"  n={size:<6} {len(batch.groups)} groups  max diff {worst:.3g}  {flips} threshold flips  "
+              f"{'same' if same else 'DIFFERENT'}")
+    return agreed
+
+
+def bench_node_layers(results, frames):
+    print("_compute_node_layers")
+    config = load_config()
+    genome = evolved_genome(config)
+    size = f"{len(genome.nodes)} nodes/{len(genome.connections)} connections"
+    inputs, outputs = config.genome_config.input_keys, config.genome_config.output_keys
+    connections = {key: cg for key, cg in genome.connections.items() if cg.enabled}
+    results.add("node_layers", f"uncached, {size}",
+                _per_call(lambda: Flappy._layer_nodes(inputs, outputs, genome.nodes, connections), frames * 10),
+                "us/call")
+    results.add("node_layers", f"cached, {size}",
+                _per_call(lambda: Flappy._compute_node_layers(genome, config), frames * 10), "us/call")
+
+
+def bench_network_diagram(results, frames):
+    print("render_network_diagram")
+    config = load_config()
+    genome = evolved_genome(config)
+    width, height = Flappy.PANEL_WIDTH - 60, 220
+    results.add("network_diagram", "uncached draw",
+                _per_call(lambda: Flappy._draw_network_diagram(genome, config, width, height), frames), "ms/call")
+    results.add("network_diagram", "cached",
+                _per_call(lambda: Flappy.render_network_diagram(genome, config, width, height), frames * 10), "us/call")
+
+
+def _clear_panel_caches():
+    Flappy.PANEL_BACKGROUND = None
+    Flappy.TEXT_CACHE.clear()
+    Flappy.DIAGRAM_CACHE.clear()
+
+
+def bench_draw_panel(results, frames):
+    print("draw_panel")
+    info = sample_panel_info(load_config())
+    win = pygame.Surface((Flappy.WINDOW_WIDTH, Flappy.HEIGHT))
+    frame = 0
+
+    def draw(clear):
+        nonlocal frame
+        frame += 1
+        # elapsed ticks over every frame, like a live run
+        info["elapsed"] = 45.6 + frame / 30
+        if clear:
+            _clear_panel_caches()
+        Flappy.draw_panel(win, info)
+
+    results.add("draw_panel", "cold caches", _per_call(lambda: draw(True), frames), "ms/frame")
+    results.add("draw_panel", "warm caches", _per_call(lambda: draw(False), frames), "ms/frame")
+
+
+def bench_bird_draw(results, sizes, frames):
+    print("bird sprites")
+    win = pygame.Surface((Flappy.WIDTH, Flappy.HEIGHT))
+    for size in sizes:
+        birds = spread_population(size, size)
+        results.add("bird_draw", "BirdPopulation.draw", _per_call(lambda: birds.draw(win), frames), "ms/frame", size)
+
+
+def bench_generation(results, sizes):
+    print("headless generation of main")
+    for size in sizes:
+        config = load_config(size)
+        genomes = list(enumerate(sample_genomes(config, size), start=1))
+        frames = 0
+        move = Flappy.BirdPopulation.move
+
+        def counting_move(birds):
+            nonlocal frames
+            frames += 1
+            move(birds)
+
+        Flappy.HEADLESS = True
+        Flappy.BirdPopulation.move = counting_move
+        try:
+            random.seed(size)
+            start = time.perf_counter()
+            Flappy.main(genomes, config)
+            elapsed = time.perf_counter() - start
+        finally:
+            Flappy.BirdPopulation.move = move
+        results.add("generation", "main (headless)", elapsed, "ms/generation", size)
+        results.add("generation", f"main (headless, {frames} frames)", elapsed / max(frames, 1), "ms/frame", size)
+
+
+def check_headless(sizes, seeds=(0, 1)):
+    """Play the same seeded generation of ``main`` headless and in the window and compare fitness.
+
+    The window runs at the fastest simulation speed, which only changes how
+    often it draws. Returns whether every genome got the same fitness both ways.
+    """
+    print("headless equivalence")
+    speed = Flappy.SIM_SPEED
+    Flappy.SIM_SPEED = len(Flappy.SIM_SPEEDS) - 1
+    agreed = True
+    try:
+        for size, seed in itertools.product(sizes, seeds):
+            config = load_config(size)
+            genomes = list(enumerate(sample_genomes(config, size, seed), start=1))
+            fitness = {}
+            for headless in (True, False):
+                Flappy.HEADLESS = headless
+                random.seed(seed)
+                Flappy.main(genomes, config)
+                fitness[headless] = [genome.fitness for _, genome in genomes]
+            same = fitness[True] == fitness[False]
+            agreed &= same
+            print(f"  n={size:<6} seed={seed}  best {max(fitness[True]):.1f}  {'same' if same else 'DIFFERENT'}")
+    finally:
+        Flappy.SIM_SPEED = speed
+    return agreed
+
+
+def bench_recording(results, size, rounds=3):
+    """Time the same headless generation of ``main`` with and without a trajectory recording."""
+    print("trajectory recording")
+    config = load_config(size)
+    genomes = list(enumerate(sample_genomes(config, size), start=1))
+    Flappy.HEADLESS = True
+    with tempfile.TemporaryDirectory() as directory:
+        for label, record_dir in (("main (headless)", None), ("main (headless, recorded)", directory)):
+            Flappy.RECORD_DIR = record_dir
+            best = float("inf")
+            try:
+                for _ in range(rounds):
+                    random.seed(size)
+                    start = time.perf_counter()
+                    Flappy.main(genomes, config)
+                    best = min(best, time.perf_counter() - start)
+            finally:
+                Flappy.RECORD_DIR = None
+            results.add("recording", label, best, "ms/generation", size)
+        # let the genome files finish before the directory goes
+        for thread in threading.enumerate():
+            if thread.name == "recording-writer":
+                thread.join()
+
+
+def stand_in_fitness(genomes, config):
+    """Score genomes by size and weight, a cheap fitness that still drives evolution."""
+    for _, genome in genomes:
+        genome.fitness = sum(abs(c.weight) for c in genome.connections.values()) + len(genome.nodes)
+
+
+def evolved_population(size, generations, seed=0, species_type=neat.DefaultSpeciesSet, reporters=()):
+    """Return a population evolved for a few generations on a cheap stand-in fitness."""
+    config = load_config(size)
+    config.species_set_type = species_type
+    random.seed(seed)
+    population = neat.Population(config)
+    for reporter in reporters:
+        population.add_reporter(reporter)
+    population.run(stand_in_fitness, generations)
+    return config, population
+
+
+class SpeciesLog(neat.reporting.BaseReporter):
+    """Keep every generation's ``genome_to_species`` map."""
+
+    def __init__(self):
+        self.assignments = []
+
+    def end_generation(self, config, population, species_set):
+        self.assignments.append(dict(species_set.genome_to_species))
+
+
+def check_speciation(sizes, generations=10, seeds=(0, 1)):
+    """Evolve the same seeded populations with every species set and compare their species.
+
+    ``CachedSpeciesSet`` mirrors neat's ``DefaultSpeciesSet.speciate`` step by
+    step, so any difference means the installed neat no longer matches it.
+    Returns whether every run agreed.
+    """
+    print(f"speciation equivalence (neat-python {importlib.metadata.version('neat-python')})")
+    agreed = True
+    for size, seed in itertools.product(sizes, seeds):
+        runs = {}
+        for name, species_type in sorted(Flappy.SPECIES_SETS.items()):
+            log = SpeciesLog()
+            evolved_population(size, generations, seed, species_type, [log])
+            runs[name] = log.assignments
+        reference = runs.pop("default")
+        for name, assignments in runs.items():
+            same = assignments == reference
+            agreed &= same
+            print(f"  {name:<8} n={size:<6} seed={seed}  {len(reference)} generations  {'same' if same else 'DIFFERENT'}")
+    return agreed
+
+
+def bench_speciation(results, sizes, generations=5):
+    """Time one speciate call of each species set on the same evolved population."""
+    print("speciation")
+    for size in sizes:
+        config, population = evolved_population(size, generations, seed=size)
+        state = pickle.dumps(population.species.species)
+        for name, species_type in sorted(Flappy.SPECIES_SETS.items()):
+            species = species_type(config.species_set_config, population.reporters)
+            species.species = pickle.loads(state)
+            species.indexer = itertools.count(max(species.species, default=0) + 1)
+            start = time.perf_counter()
+            species.speciate(config, population.population, population.generation)
+            elapsed = time.perf_counter() - start
+            results.add("speciation", f"{name} ({len(species.species)} species)", elapsed, "ms/generation", size)
+
+
+COLD_START = """
+import time
+start = time.perf_counter()
+import Flappy
+imported = time.perf_counter()
+{body}
+print(imported - start, time.perf_counter() - imported, ",".join(Flappy.ASSETS.loaded()))
+"""
+
+HEADLESS_GENERATION = """
+import random
+import neat
+config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                            neat.DefaultStagnation, {config!r})
+random.seed(0)
+genomes = list(neat.Population(config).population.items())
+Flappy.play(genomes, config, headless=True, course=Flappy.Course(0), caps={{"frames": 100, "score": None, "seconds": None}})
+"""
+
+
+def _cold_start(body, rounds):
+    """Run ``body`` after ``import Flappy`` in fresh interpreters; return median import and body times and the assets built."""
+    code = COLD_START.format(body=body)
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    imports, bodies = [], []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", "import neat, numpy, pygame\n" + code], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=env, check=True)
+        imported, ran, loaded = (output.stdout.strip().splitlines()[-1].split(" ") + [""])[:3]
+        imports.append(float(imported))
+        bodies.append(float(ran))
+    return sorted(imports)[rounds // 2], sorted(bodies)[rounds // 2], loaded
+
+
+def bench_cold_start(results, rounds=5):
+    """Time ``import Flappy`` and a first headless generation in a fresh interpreter.
+
+    pygame, neat and numpy are imported before the clock starts, so only the
+    module's own start-up is measured.
+    """
+    print("cold start")
+    imported, _, loaded = _cold_start("", rounds)
+    results.add("cold_start", "import Flappy", imported, "ms")
+    print(f"    assets built: {loaded or 'none'}")
+    _, ran, loaded = _cold_start(HEADLESS_GENERATION.format(config=CONFIG_PATH), rounds)
+    results.add("cold_start", "first headless generation (100 frames)", ran, "ms")
+    print(f"    assets built: {loaded or 'none'}")
+
+
+def _legacy_collide(pipe, x, y, img):
+    """Collision test as it was before masks were cached: three masks per pair."""
+    birdMask = pygame.mask.from_surface(img)
+    topMask = pygame.mask.from_surface(pygame.transform.flip(Flappy.ASSETS["pipeIMG"], False, True))
+    botMask = pygame.mask.from_surface(Flappy.ASSETS["pipeIMG"])
+    topOffset = (pipe.x - x, pipe.top - round(y))
+    botOffset = (pipe.x - x, pipe.bot - round(y))
+    return bool(birdMask.overlap(botMask, botOffset) or birdMask.overlap(topMask, topOffset))
+
+
+def _legacy_draw(win, birds):
+    """Bird drawing as it was before the atlas: one rotate per bird per frame."""
+    for i in birds.alive_indices():
+        img = Flappy.ASSETS["birdIMGs"][birds.frame[i]]
+        rotated = pygame.transform.rotate(img, birds.tilt[i])
+        win.blit(rotated, rotated.get_rect(center=img.get_rect(topleft=(birds.x, birds.y[i])).center).topleft)
+
+
+def bench_legacy(results, sizes, frames):
+    """Time the implementations that the mask cache and sprite atlas replaced."""
+    print("legacy implementations")
+    win = pygame.Surface((Flappy.WIDTH, Flappy.HEIGHT))
+    for size in sizes:
+        birds = spread_population(size, size)
+        pipes = [Flappy.Pipe(210, 300), Flappy.Pipe(510, 250)]
+
+        def collide_all():
+            for pipe in pipes:
+                for i in birds.alive_indices():
+                    _legacy_collide(pipe, birds.x, birds.y[i], Flappy.ASSETS["birdIMGs"][birds.frame[i]])
+
+        results.add("legacy", "uncached masks collide", _per_call(collide_all, max(1, frames // 10), rounds=1),
+                    "ms/frame", size)
+        results.add("legacy", "rotate per bird draw", _per_call(lambda: _legacy_draw(win, birds), max(1, frames // 10)),
+                    "ms/frame", size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Flappy Bird training loop.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000], help="population sizes to test")
+    parser.add_argument("--frames", type=int, default=50, help="frames to average over")
+    parser.add_argument("--generation-sizes", type=int, nargs="+", default=[50, 500],
+                        help="population sizes for the full headless generation")
+    parser.add_argument("--recording-size", type=int, default=1000,
+                        help="population size for the generation timed with and without recording")
+    parser.add_argument("--speciation-sizes", type=int, nargs="+", default=[500, 2000],
+                        help="population sizes for one speciation pass")
+    parser.add_argument("--check-speciation", action="store_true",
+                        help="only check that every species set assigns the same species, and exit")
+    parser.add_argument("--check-activation", action="store_true",
+                        help="only check NetworkBatch against neat's FeedForwardNetwork at --sizes, and exit")
+    parser.add_argument("--check-collision", action="store_true",
+                        help="only check BirdPopulation.collide against Pipe.collide at --sizes, and exit")
+    parser.add_argument("--check-headless", action="store_true",
+                        help="only check that headless and windowed generations at --generation-sizes agree, and exit")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this JSON file")
+    parser.add_argument("--legacy", action="store_true", help="include the pre-cache implementations")
+    args = parser.parse_args()
+
+    checks = []
+    if args.check_speciation:
+        checks.append(lambda: check_speciation(args.speciation_sizes))
+    if args.check_activation:
+        checks.append(lambda: check_activation(args.sizes))
+    if args.check_collision:
+        checks.append(lambda: check_collision(args.sizes))
+    if args.check_headless:
+        checks.append(lambda: check_headless(args.generation_sizes))
+    if checks:
+        # every check runs, even after one fails
+        sys.exit(0 if all([check() for check in checks]) else 1)
+
+    results = Results()
+    bench_bird_move(results, args.sizes, args.frames)
+    bench_pipe_collide(results, args.sizes, args.frames)
+    bench_activation(results, args.sizes, args.frames)
+    bench_node_layers(results, args.frames)
+    bench_network_diagram(results, args.frames)
+    bench_draw_panel(results, args.frames)
+    bench_bird_draw(results, args.sizes, args.frames)
+    bench_generation(results, args.generation_sizes)
+    bench_recording(results, args.recording_size)
+    bench_speciation(results, args.speciation_sizes)
+    bench_cold_start(results)
+    if args.legacy:
+        bench_legacy(results, args.sizes, args.frames)
+
+    if args.json:
+        results.to_json(args.json)
+        print(f"wrote {args.json}")